@@ -1,8 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 import database
-from app import get_current_admin
+from app import get_current_admin, page_params, paged
 
 admin_router = APIRouter()
 
@@ -14,31 +14,54 @@ class QuestionCreate(BaseModel):
     domain_id: str
     text: str
 
+def listing_params(allowed_fields):
+    """Dependency for ?mode=&fields=; a field outside allowed_fields is a 400, not an
+    empty listing"""
+    def params(
+        mode: str = Query("summary", pattern="^(summary|full)$"),
+        fields: Optional[str] = Query(None, description="Comma-separated fields to return")
+    ):
+        field_list = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+        unknown = sorted(set(field_list or []) - allowed_fields)
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(sorted(allowed_fields))}"
+            )
+        return {"mode": mode, "fields": field_list}
+    return params
+
 # Create a new domain
 @admin_router.post("/create-domain")
 async def create_domain(domain: DomainCreate, current_admin=Depends(get_current_admin)):
-    if database.get_domain(domain.name):
+    if await database.get_domain(domain.name):
         raise HTTPException(status_code=400, detail="Domain already exists")
-    return database.create_domain(domain.name)
+    return await database.create_domain(domain.name)
 
 # Add questions to a domain
 @admin_router.post("/add-question")
 async def add_question(question: QuestionCreate, current_admin=Depends(get_current_admin)):
-    if not database.get_domain_by_id(question.domain_id):
+    if not await database.get_domain_by_id(question.domain_id):
         raise HTTPException(status_code=404, detail="Domain not found")
-    return database.add_question(question.domain_id, question.text)
+    return await database.add_question(question.domain_id, question.text)
 
 # Get all domains
 @admin_router.get("/domains", response_model=List[dict])
 async def get_domains(current_admin=Depends(get_current_admin)):
-    return database.get_all_domains()
+    return await database.get_all_domains()
 
 # Get all questions
 @admin_router.get("/all-questions", response_model=List[dict])
-async def get_all_questions(current_admin=Depends(get_current_admin)):
-    return database.get_all_questions()
+async def get_all_questions(listing=Depends(listing_params(database.QUESTION_FIELDS)), current_admin=Depends(get_current_admin)):
+    return await database.get_all_questions(**listing)
 
 # Get all responses
 @admin_router.get("/all-responses", response_model=List[dict])
-async def get_all_responses(current_admin=Depends(get_current_admin)):
-    return database.get_all_responses()
\ No newline at end of file
+async def get_all_responses(
+    response: Response,
+    listing=Depends(listing_params(database.RESPONSE_FIELDS)),
+    page=Depends(page_params),
+    current_admin=Depends(get_current_admin)
+):
+    responses = await database.get_all_responses(**listing, **page)
+    return paged(response, responses, page["limit"])
\ No newline at end of file
@@ -0,0 +1,211 @@
+import asyncio
+import os
+import socket
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+import background
+import database
+import mailer
+from config import (
+    EMAIL_FROM, ANNOUNCEMENT_BATCH_SIZE, ANNOUNCEMENT_RATE_PER_MINUTE, ANNOUNCEMENT_LEASE_SECONDS,
+    ANNOUNCEMENT_WORKERS, ANNOUNCEMENT_BATCH_RETRIES, ANNOUNCEMENT_SWEEP_SECONDS
+)
+
+# Fan-out lifecycle: pending -> running -> done. A running job renews its lease
+# after every batch; one whose lease lapsed (worker died) is picked up again by
+# the sweeper and continues after the last user it reached.
+jobs = database.announcement_jobs
+owner = f"{socket.gethostname()}:{os.getpid()}"
+sweeper = None
+# Separate from mailer.executor so fan-out never queues behind (or ahead of) OTP emails
+executor = ThreadPoolExecutor(max_workers=ANNOUNCEMENT_WORKERS, thread_name_prefix="announce")
+
+
+async def create(post_id, content, admin_name):
+    now = datetime.utcnow()
+    result = await jobs.insert_one({
+        "post_id": post_id,
+        "subject": f"New announcement from {admin_name}",
+        "body": content,
+        "status": "pending",
+        "last_user_id": None,
+        "total": await database.users.count_documents({"email": {"$ne": None}}),
+        "sent": 0,
+        "failed": 0,
+        "owner": None,
+        "lease_id": None,
+        "lease_expires_at": None,
+        "created_at": now,
+        "updated_at": now
+    })
+    return result.inserted_id
+
+
+def claimable(now):
+    """Jobs that are new or whose previous runner stopped renewing the lease"""
+    return {"$or": [
+        {"status": "pending"},
+        {"status": "running", "lease_expires_at": {"$lte": now}}
+    ]}
+
+
+async def claim(job_id=None):
+    """Lease a job that is new or whose previous runner stopped renewing it"""
+    now = datetime.utcnow()
+    query = claimable(now)
+    if job_id is not None:
+        query["_id"] = job_id
+    return await jobs.find_one_and_update(
+        query,
+        {"$set": {
+            "status": "running",
+            "owner": owner,
+            "lease_id": uuid.uuid4().hex,
+            "lease_expires_at": now + timedelta(seconds=ANNOUNCEMENT_LEASE_SECONDS),
+            "updated_at": now
+        }},
+        return_document=ReturnDocument.AFTER
+    )
+
+
+async def recipients(after_id, batch_size):
+    """Next batch of user emails in _id order, so a resumed job skips users already mailed"""
+    query = {"email": {"$ne": None}}
+    if after_id is not None:
+        query["_id"] = {"$gt": after_id}
+    cursor = database.users.find(query, {"email": 1}).sort("_id", 1).limit(batch_size)
+    return [(user["_id"], user["email"]) async for user in cursor]
+
+
+async def renew(job):
+    """Extend our lease; False if another worker has taken the job over"""
+    now = datetime.utcnow()
+    result = await jobs.update_one(
+        {"_id": job["_id"], "lease_id": job["lease_id"]},
+        {"$set": {"lease_expires_at": now + timedelta(seconds=ANNOUNCEMENT_LEASE_SECONDS), "updated_at": now}}
+    )
+    return result.matched_count == 1
+
+
+async def send_batch(job, connection, msg, emails):
+    """Send one batch, retrying transient failures with backoff.
+    Returns "sent", "failed", or "lost" if the lease was lost while retrying."""
+    loop = asyncio.get_running_loop()
+    for attempt in range(ANNOUNCEMENT_BATCH_RETRIES + 1):
+        try:
+            await loop.run_in_executor(executor, connection.send, msg, emails)
+            return "sent"
+        except Exception as e:
+            await loop.run_in_executor(executor, connection.close)
+            if attempt == ANNOUNCEMENT_BATCH_RETRIES or not mailer.is_transient(e):
+                print(f"Announcement {job['_id']} batch failed: {e}")
+                return "failed"
+        await asyncio.sleep(2 ** attempt)
+        # Retries can outlast the lease; don't resend a batch another worker now owns
+        if not await renew(job):
+            return "lost"
+
+
+async def process(job):
+    # Rendered once; every batch goes out as a single message with the batch as
+    # envelope recipients, so addresses are never disclosed to each other
+    msg = mailer.build_message(EMAIL_FROM, job["subject"], job["body"])
+    connection = mailer.SMTPConnection()
+    loop = asyncio.get_running_loop()
+    seconds_per_batch = 60.0 * ANNOUNCEMENT_BATCH_SIZE / ANNOUNCEMENT_RATE_PER_MINUTE
+    last_user_id = job["last_user_id"]
+
+    try:
+        while batch := await recipients(last_user_id, ANNOUNCEMENT_BATCH_SIZE):
+            started = time.monotonic()
+            emails = [email for _, email in batch]
+            outcome = await send_batch(job, connection, msg, emails)
+            if outcome == "lost":
+                return
+            progress = {outcome: len(emails)}
+            last_user_id = batch[-1][0]
+
+            now = datetime.utcnow()
+            result = await jobs.update_one(
+                {"_id": job["_id"], "lease_id": job["lease_id"]},
+                {
+                    "$set": {
+                        "last_user_id": last_user_id,
+                        "lease_expires_at": now + timedelta(seconds=ANNOUNCEMENT_LEASE_SECONDS),
+                        "updated_at": now
+                    },
+                    "$inc": progress
+                }
+            )
+            if result.matched_count == 0:
+                # Lease lost to another worker; it carries on from our last checkpoint
+                return
+            await asyncio.sleep(max(0, seconds_per_batch - (time.monotonic() - started)))
+    finally:
+        await loop.run_in_executor(executor, connection.close)
+
+    await jobs.update_one(
+        {"_id": job["_id"], "lease_id": job["lease_id"]},
+        {"$set": {"status": "done", "lease_expires_at": None, "updated_at": datetime.utcnow()}}
+    )
+
+
+async def run(job_id=None):
+    try:
+        job = await claim(job_id)
+        if job:
+            await process(job)
+    except Exception as e:
+        print(f"Error sending announcement {job_id}: {e}")
+
+
+def schedule(job_id=None):
+    """Send in the background without blocking the caller"""
+    background.schedule(run(job_id))
+
+
+async def resume():
+    """Pick up fan-outs left unfinished by a worker that stopped"""
+    stalled = await jobs.count_documents(claimable(datetime.utcnow()))
+    for _ in range(stalled):
+        schedule()
+
+
+async def sweep():
+    """Resume jobs periodically, so one orphaned after boot is not left behind"""
+    while True:
+        await asyncio.sleep(ANNOUNCEMENT_SWEEP_SECONDS)
+        try:
+            await resume()
+        except Exception as e:
+            print(f"Error sweeping announcement jobs: {e}")
+
+
+def start():
+    global sweeper
+    if sweeper is None:
+        sweeper = asyncio.get_running_loop().create_task(sweep())
+
+
+async def stop():
+    global sweeper
+    if sweeper is not None:
+        sweeper.cancel()
+        sweeper = None
+
+
+async def get_status(post_id):
+    job = await jobs.find_one({"post_id": post_id}, sort=[("created_at", -1)])
+    if not job:
+        return None
+    return {
+        "post_id": post_id,
+        "status": job["status"],
+        "total": job["total"],
+        "sent": job["sent"],
+        "failed": job["failed"],
+        "updated_at": job["updated_at"]
+    }
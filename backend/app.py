@@ -1,24 +1,96 @@
+import time
+IMPORT_STARTED = time.perf_counter()
+
 from bson import ObjectId
-from fastapi import FastAPI, Depends, HTTPException, Query, status
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, File, Form, HTTPException, Query, Request, UploadFile, status
+import asyncio
+import csv
+import hashlib
+import hmac
+import io
+import json
 import re
-from fastapi.responses import JSONResponse
+import tempfile
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import BaseModel,validator
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Optional
+from typing import Any, List, Optional
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
-import smtplib
-from email.mime.text import MIMEText
+import os
 import gemini_api
 import database
+import announcements
+import catalog
+import evaluation_cache
+import evaluation_queue
+import invalidation_bus
+import mailer
+import pdf_import
+import thumbnails
+from cache import TTLCache
 from config import (
     SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES,
-    SMTP_SERVER, SMTP_PORT, SMTP_USERNAME, SMTP_PASSWORD, EMAIL_FROM,
+    PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL_SECONDS,
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, EXPORT_BATCH_SIZE,
+    MAX_BULK_QUESTIONS, QUESTION_INSERT_CHUNK_SIZE, MAX_PDF_UPLOAD_MB,
+    CATALOG_MAX_AGE_SECONDS, CATALOG_WARM_DOMAINS, CATALOG_WARM_CONCURRENCY,
     DEFAULT_ADMIN_EMAIL, DEFAULT_ADMIN_PASSWORD,HOST
 )
 
-app = FastAPI()
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Every worker runs this, but the bootstrap itself runs in only one of them
+    boot_started = time.perf_counter()
+    try:
+        ran_bootstrap = await database.run_once("bootstrap", bootstrap, bootstrap_version())
+        bootstrap_error = None
+    except Exception as e:
+        # run_once released the lock, so the next worker to boot retries
+        print(f"❌ Bootstrap failed: {e}")
+        ran_bootstrap, bootstrap_error = False, str(e)
+    # Recovery steps are retried later (by the announcement sweeper, and on
+    # each import status poll), so a failure here must not stop the worker
+    recovery_errors = {}
+    for step, recover in (("announcements", announcements.resume), ("pdf_imports", pdf_import.reap)):
+        try:
+            await recover()
+        except Exception as e:
+            print(f"❌ Boot step {step} failed: {e}")
+            recovery_errors[step] = str(e)
+    announcements.start()
+    invalidation_bus.start()
+    # Warm the catalog in the background so boot time doesn't grow with the
+    # number of domains; requests that arrive first simply build on a miss
+    warming = asyncio.get_running_loop().create_task(warm_catalog())
+    app.state.boot_report = {
+        "pid": os.getpid(),
+        "import_seconds": round(IMPORT_SECONDS, 3),
+        "startup_seconds": round(time.perf_counter() - boot_started, 3),
+        "ran_bootstrap": ran_bootstrap,
+        "bootstrap_error": bootstrap_error,
+        "recovery_errors": recovery_errors
+    }
+    print(f"✅ Worker ready: {app.state.boot_report}")
+    yield
+    warming.cancel()
+    await announcements.stop()
+    await invalidation_bus.stop()
+    await mailer.stop()
+
+app = FastAPI(lifespan=lifespan)
+
+@app.exception_handler(database.HashPoolBusy)
+async def hash_pool_busy(request: Request, exc: database.HashPoolBusy):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server is busy, please try again"},
+        headers={"Retry-After": "1"}
+    )
 
 @app.api_route("/", methods=["GET", "HEAD"])
 def root():
@@ -42,7 +114,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE"],
     allow_headers=["Authorization", "Content-Type"],
-    expose_headers=["*"],
+    expose_headers=["*", "X-Next-Cursor"],
     max_age=600  # 10 minutes
 )
 
@@ -127,11 +199,11 @@ class AdminRequestResponse(BaseModel):
         
         
 # In app.py
-def initialize_default_admin():
-    admin = database.users.find_one({"email": DEFAULT_ADMIN_EMAIL})
+async def initialize_default_admin():
+    admin = await database.users.find_one({"email": DEFAULT_ADMIN_EMAIL})
     if not admin:
         # Create admin user
-        admin_id = database.create_user(
+        admin_id = await database.create_user(
             username="admin",
             email=DEFAULT_ADMIN_EMAIL,
             password=DEFAULT_ADMIN_PASSWORD,
@@ -140,17 +212,17 @@ def initialize_default_admin():
         
         if admin_id:
             # Ensure verified is set to True
-            database.users.update_one(
+            await database.users.update_one(
                 {"_id": admin_id}, 
                 {"$set": {"verified": True}}
             )
             print(f"Created default admin with ID: {admin_id}")
         else:
             # Check if user exists despite create_user returning None
-            admin = database.users.find_one({"email": DEFAULT_ADMIN_EMAIL})
+            admin = await database.users.find_one({"email": DEFAULT_ADMIN_EMAIL})
             if admin:
                 # Update the user to be verified and an admin
-                database.users.update_one(
+                await database.users.update_one(
                     {"email": DEFAULT_ADMIN_EMAIL},
                     {"$set": {"verified": True, "role": "admin"}}
                 )
@@ -158,20 +230,40 @@ def initialize_default_admin():
             else:
                 print("Failed to create default admin")
     else:
-        # Ensure existing admin is verified and update password
+        # Ensure existing admin is verified; only rehash when the password
+        # changed or the stored hash uses outdated bcrypt settings
         update_data = {
             "verified": True,
-            "role": "admin",
-            "password_hash": database.get_password_hash(DEFAULT_ADMIN_PASSWORD)
+            "role": "admin"
         }
-        database.users.update_one(
+        valid, new_hash = await database.verify_and_update_password(
+            DEFAULT_ADMIN_PASSWORD, admin.get("password_hash", "")
+        )
+        if not valid:
+            update_data["password_hash"] = await database.get_password_hash(DEFAULT_ADMIN_PASSWORD)
+        elif new_hash:
+            update_data["password_hash"] = new_hash
+        await database.users.update_one(
             {"email": DEFAULT_ADMIN_EMAIL},
             {"$set": update_data}
         )
         print("✅ Updated default admin credentials")
 
-# Run on startup
-initialize_default_admin()
+def bootstrap_version():
+    """Changes whenever bootstrap has new work to do: a different collection/index
+    spec or default admin. Keyed with SECRET_KEY so the stored value says nothing
+    about the admin password."""
+    spec = json.dumps([database.collections_version(), DEFAULT_ADMIN_EMAIL, DEFAULT_ADMIN_PASSWORD])
+    return hmac.new((SECRET_KEY or "").encode("utf-8"), spec.encode("utf-8"), hashlib.sha256).hexdigest()
+
+# Run on startup (from lifespan, in one worker only, once per bootstrap_version)
+async def bootstrap():
+    try:
+        await database.create_collections()
+    finally:
+        # Still worth doing when some index failed; the failure is re-raised after
+        await database.backfill_question_hashes()
+        await initialize_default_admin()
 
 # Auth Utilities
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
@@ -182,6 +274,27 @@ def create_access_token(data: dict):
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+# Resolved principals keyed by token, so authenticated requests skip the users lookup
+principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL_SECONDS)
+
+def invalidate_principal(username: Optional[str] = None, email: Optional[str] = None):
+    """Drop cached principals after a user is deleted or their role changes,
+    in this worker and every other one"""
+    invalidation_bus.publish("user", {"username": username, "email": email})
+
+def drop_principal(user: dict):
+    principal_cache.invalidate_where(
+        lambda token, principal: principal.username == user.get("username") or principal.email == user.get("email")
+    )
+
+# Invalidations published by any worker reach this worker's caches through the bus
+invalidation_bus.subscribe("user", drop_principal)
+invalidation_bus.subscribe("user", catalog.drop_admin)
+invalidation_bus.subscribe("domains", catalog.drop_domains)
+invalidation_bus.subscribe("questions", catalog.drop_questions)
+invalidation_bus.on_flush(principal_cache.clear)
+invalidation_bus.on_flush(catalog.clear)
+
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -196,16 +309,24 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     except JWTError:
         raise credentials_exception
     
-    user = database.users.find_one({"username": username})
+    cached = principal_cache.get(token)
+    if cached is not None:
+        return cached
+    
+    user = await database.users.find_one({"username": username})
     if user is None:
         raise credentials_exception
     
-    return User(
+    principal = User(
         username=user["username"],
         email=user["email"],
         role=user["role"],
         verified=user.get("verified", False)
     )
+    # Never keep a principal around longer than its token is valid
+    ttl = min(PRINCIPAL_CACHE_TTL_SECONDS, payload.get("exp", 0) - time.time())
+    principal_cache.set(token, principal, ttl=ttl)
+    return principal
 
 async def get_current_admin(current_user: User = Depends(get_current_user)):
     print(f"Admin check for user: {current_user.username}, role: {current_user.role}")
@@ -216,22 +337,33 @@ async def get_current_admin(current_user: User = Depends(get_current_user)):
         )
     return current_user
 
+@app.get("/boot-report")
+async def boot_report(admin: User = Depends(get_current_admin)):
+    """Import and startup timings for this worker"""
+    return app.state.boot_report
+
+# Pagination: list endpoints return one page and put the cursor for the next
+# page in the X-Next-Cursor header (absent on the last page). Clients that need
+# the whole list must follow the cursor; the dashboards do.
+def page_params(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page")
+):
+    try:
+        return {"limit": limit, "cursor": database.decode_cursor(cursor) if cursor else None}
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def paged(response: Response, items: list, limit: int) -> list:
+    items, next_cursor = database.next_page(items, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return items
+
 # Email Service
 def send_email(to_email: str, subject: str, body: str) -> bool:
-    msg = MIMEText(body)
-    msg['Subject'] = subject
-    msg['From'] = EMAIL_FROM
-    msg['To'] = to_email
-    
-    try:
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-            server.starttls()
-            server.login(SMTP_USERNAME, SMTP_PASSWORD)
-            server.send_message(msg)
-        return True
-    except Exception as e:
-        print(f"Email send error: {e}")
-        return False
+    """Queue an email on the pooled mailer; delivery and retries happen in the background"""
+    return mailer.send(to_email, subject, body)
     
 @app.post("/signup")
 async def signup(user: UserCreate):
@@ -244,14 +376,14 @@ async def signup(user: UserCreate):
         )
     
     # Check if user exists
-    if database.users.find_one({"$or": [{"username": user.username}, {"email": user.email}]}):
+    if await database.users.find_one({"$or": [{"username": user.username}, {"email": user.email}]}):
         raise HTTPException(
             status_code=400,
             detail="Username or email already exists"
         )
     
     # Verify OTP first
-    otp_record = database.otps.find_one({"email": user.email, "verified": True})
+    otp_record = await database.otps.find_one({"email": user.email, "verified": True})
     if not otp_record:
         raise HTTPException(
             status_code=400,
@@ -259,7 +391,7 @@ async def signup(user: UserCreate):
         )
     
     # Create user
-    user_id = database.create_user(
+    user_id = await database.create_user(
         username=user.username,
         email=user.email,
         password=user.password,
@@ -273,7 +405,7 @@ async def signup(user: UserCreate):
         )
     
     # Delete the used OTP
-    database.otps.delete_one({"email": user.email})
+    await database.otps.delete_one({"email": user.email})
     
     return {"message": "User created successfully. You can now login."}
 
@@ -281,7 +413,7 @@ async def signup(user: UserCreate):
 # Fix the token endpoint to always include role
 @app.post("/token", response_model=Token)
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = database.users.find_one({
+    user = await database.users.find_one({
         "$or": [
             {"username": form_data.username},
             {"email": form_data.username}
@@ -291,9 +423,19 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     if not user:
         raise HTTPException(status_code=400, detail="Invalid credentials")
     
-    if not database.verify_password(form_data.password, user["password_hash"]):
+    valid, new_hash = await database.verify_and_update_password(
+        form_data.password, user["password_hash"]
+    )
+    if not valid:
         raise HTTPException(status_code=400, detail="Invalid credentials")
     
+    # Transparently upgrade hashes created with an older bcrypt cost
+    if new_hash:
+        await database.users.update_one(
+            {"_id": user["_id"]},
+            {"$set": {"password_hash": new_hash}}
+        )
+    
     # Check if user has pending admin request
     if user.get("admin_request_pending", False):
         raise HTTPException(
@@ -326,7 +468,7 @@ async def check_admin_request(
             detail="You can only check your own status"
         )
     
-    pending_request = database.admin_requests.find_one({
+    pending_request = await database.admin_requests.find_one({
         "email": email,
         "status": "pending"
     })
@@ -335,11 +477,15 @@ async def check_admin_request(
 
 
 @app.get("/admin/posts", response_model=list[dict])
-async def get_admin_posts(current_user: User = Depends(get_current_user)):  # Changed from get_current_admin
+async def get_admin_posts(
+    response: Response,
+    page: dict = Depends(page_params),
+    current_user: User = Depends(get_current_user)  # Changed from get_current_admin
+):
     """Get admin posts (accessible to all authenticated users)"""
     try:
-        posts = database.get_all_admin_posts()
-        return posts
+        posts = await database.get_all_admin_posts(**page)
+        return paged(response, posts, page["limit"])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -354,7 +500,7 @@ async def get_admin_requests(admin: User = Depends(get_current_admin)):
             detail="Only the default admin can view admin requests"
         )
     try:
-        requests = database.get_pending_admin_requests()
+        requests = await database.get_pending_admin_requests()
         print(f"Found {len(requests)} admin requests")
         return requests
     except Exception as e:
@@ -364,7 +510,7 @@ async def get_admin_requests(admin: User = Depends(get_current_admin)):
 @app.get("/check-email")
 async def check_email(email: str = Query(..., description="Email to check")):
     """Check if email exists in the database"""
-    user = database.users.find_one({"email": email})
+    user = await database.users.find_one({"email": email})
     return {"exists": user is not None}
 
 @app.post("/send-otp")
@@ -378,9 +524,9 @@ async def send_otp(email: str = Query(..., description="Email address to send OT
             )
 
         # Generate and store OTP
-        otp = database.create_otp(email)
+        otp = await database.create_otp(email)
         
-        # Send email
+        # Queue the email; the OTP is already stored, so there is no need to wait for SMTP
         email_sent = send_email(
             email,
             "Your Verification OTP",
@@ -389,11 +535,13 @@ async def send_otp(email: str = Query(..., description="Email address to send OT
         
         if not email_sent:
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to send email"
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Email service is busy, please try again"
             )
         
         return {"message": "OTP sent successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -403,7 +551,7 @@ async def send_otp(email: str = Query(..., description="Email address to send OT
 @app.post("/verify-otp")
 async def verify_otp(otp_data: VerifyOTP):
     # Check if OTP record exists
-    record = database.otps.find_one({"email": otp_data.email})
+    record = await database.otps.find_one({"email": otp_data.email})
     if not record:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -425,7 +573,7 @@ async def verify_otp(otp_data: VerifyOTP):
         )
     
     # Mark OTP as verified
-    database.otps.update_one(
+    await database.otps.update_one(
         {"email": otp_data.email},
         {"$set": {"verified": True}}
     )
@@ -436,7 +584,7 @@ async def verify_otp(otp_data: VerifyOTP):
 @app.post("/request-admin-access")
 async def request_admin_access(request: AdminRequest):
     # Verify the email was verified through OTP
-    otp_record = database.otps.find_one({"email": request.email, "verified": True})
+    otp_record = await database.otps.find_one({"email": request.email, "verified": True})
     if not otp_record:
         raise HTTPException(
             status_code=400,
@@ -444,7 +592,7 @@ async def request_admin_access(request: AdminRequest):
         )
     
     # Check for existing admin request
-    existing_request = database.admin_requests.find_one({
+    existing_request = await database.admin_requests.find_one({
         "email": request.email,
         "status": "pending"
     })
@@ -455,7 +603,7 @@ async def request_admin_access(request: AdminRequest):
         )
     
     # Create new request with all fields
-    success = database.request_admin_access(
+    success = await database.request_admin_access(
         email=request.email,
         message=request.message,
         full_name=request.full_name,
@@ -487,7 +635,7 @@ async def grant_admin_access(
             )
             
         # Get the pending admin request
-        admin_request = database.admin_requests.find_one({
+        admin_request = await database.admin_requests.find_one({
             "email": request.email,
             "status": "pending"
         })
@@ -499,7 +647,7 @@ async def grant_admin_access(
             )
             
         # Grant admin access - this will now handle user creation if needed
-        success = database.grant_admin_access(
+        success = await database.grant_admin_access(
             email=request.email,
             processed_by=admin.email
         )
@@ -509,11 +657,13 @@ async def grant_admin_access(
                 status_code=400,
                 detail="Failed to grant admin access"
             )
+        invalidate_principal(email=request.email)
         
         return {"message": f"Admin access granted to {request.email}"}
         
-    except HTTPException as he:
-        raise he
+    except (HTTPException, database.HashPoolBusy):
+        # HashPoolBusy becomes a 503 in its exception handler
+        raise
     except Exception as e:
         print(f"Error in grant_admin_access: {str(e)}")
         raise HTTPException(
@@ -523,7 +673,7 @@ async def grant_admin_access(
 # User Endpoints
 @app.get("/users/me", response_model=User)
 async def read_users_me(current_user: User = Depends(get_current_user)):
-    user = database.users.find_one({"username": current_user.username})
+    user = await database.users.find_one({"username": current_user.username})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -560,6 +710,37 @@ class QuestionCreate(BaseModel):
     text: str
     time_limit: int = 60 
 
+class BulkQuestionsCreate(BaseModel):
+    questions: List[QuestionCreate]
+
+    @validator('questions')
+    def validate_questions(cls, v):
+        if not v:
+            raise ValueError("At least one question is required")
+        if len(v) > MAX_BULK_QUESTIONS:
+            raise ValueError(f"At most {MAX_BULK_QUESTIONS} questions per request")
+        for question in v:
+            question.text = question.text.strip()
+            if not question.text:
+                raise ValueError("Question text cannot be empty")
+            if question.time_limit <= 0:
+                raise ValueError("Time limit must be positive")
+        return v
+
+class BulkQuestionResult(BaseModel):
+    index: int
+    status: str
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+class BulkQuestionsResult(BaseModel):
+    message: str
+    ids: List[str]
+    created: int
+    duplicate: int
+    failed: int
+    results: List[BulkQuestionResult]
+
 class QuestionResponse(BaseModel):
     id: str
     domain_id: str
@@ -579,9 +760,13 @@ class UserResponseResponse(BaseModel):
     user_id: str
     user_response: str
     created_at: datetime
+    thumbnail: Optional[str] = None  # Small WebP data URL of the proctoring photo
+    question_text: Optional[str] = None
+    evaluation_score: Optional[Any] = None
     
 class AdminPostCreate(BaseModel):
     content: str
+    notify_users: bool = False  # Also email the post to every user
 
 # For AdminPostResponse model
 class AdminPostResponse(BaseModel):
@@ -605,7 +790,7 @@ async def create_domain(
     admin: User = Depends(get_current_admin)
 ):
     """Create a new domain (category) for interview questions"""
-    domain_id = database.create_domain(domain.name, admin.email)
+    domain_id = await database.create_domain(domain.name, admin.email)
     if not domain_id:
         raise HTTPException(status_code=400, detail="Failed to create domain")
     return {
@@ -627,43 +812,96 @@ async def create_admin_post(
         "content": post.content,
         "created_at": datetime.utcnow()
     }
-    post_id = database.create_admin_post(post_data)
+    post_id = await database.create_admin_post(post_data)
+    if post.notify_users and post_id:
+        job_id = await announcements.create(str(post_id), post.content, admin.username)
+        announcements.schedule(job_id)
     return {**post_data, "id": str(post_id)}
 
+@app.get("/admin/posts/{post_id}/announcement")
+async def get_announcement_status(
+    post_id: str,
+    admin: User = Depends(get_current_admin)
+):
+    """Progress of a post's email fan-out"""
+    result = await announcements.get_status(post_id)
+    if not result:
+        raise HTTPException(status_code=404, detail="No announcement for this post")
+    return result
+
 @app.get("/admin/posts", response_model=List[AdminPostResponse])
-async def get_admin_posts(admin: User = Depends(get_current_admin)):
+async def get_admin_posts(
+    response: Response,
+    page: dict = Depends(page_params),
+    admin: User = Depends(get_current_admin)
+):
     """Get all admin posts"""
-    posts = database.get_all_admin_posts()
-    return posts
+    posts = await database.get_all_admin_posts(**page)
+    return paged(response, posts, page["limit"])
 
 
 @app.get("/admin/domains", response_model=list[DomainResponse])
 async def get_domains(admin: User = Depends(get_current_admin)):
     """Get all available domains for the current admin"""
     try:
-        domains = database.get_all_domains(admin.email)
+        domains = await database.get_all_domains(admin.email)
         return domains
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal server error")
 
+# Catalog listings are served from catalog's pre-serialized bodies with an ETag,
+# so unchanged lists cost a 304 and no Mongo round trip
+async def build_domains(admin_email=None):
+    if admin_email and not await database.users.find_one({"email": admin_email, "role": "admin"}, {"_id": 1}):
+        return None
+    domains = await database.get_all_domains(admin_email)
+    return [DomainResponse(**d).model_dump(mode="json") for d in domains]
+
+async def interview_bundle(domain_id: str):
+    """The domain's pre-serialized question list (see database.get_interview_bundle),
+    or None if the domain does not exist"""
+    return await catalog.get_entry(("questions", domain_id), lambda: database.get_interview_bundle(domain_id))
+
+async def warm_catalog():
+    """Pre-build the domain list and the newest CATALOG_WARM_DOMAINS bundles,
+    CATALOG_WARM_CONCURRENCY at a time"""
+    semaphore = asyncio.Semaphore(CATALOG_WARM_CONCURRENCY)
+
+    async def warm(domain_id):
+        async with semaphore:
+            try:
+                await interview_bundle(domain_id)
+            except Exception as e:
+                print(f"Error warming catalog for domain {domain_id}: {e}")
+
+    try:
+        await catalog.get(("domains", None), build_domains)
+        cursor = database.domains.find({}, {"_id": 1}).sort("_id", -1).limit(CATALOG_WARM_DOMAINS)
+        await asyncio.gather(*[warm(str(domain["_id"])) async for domain in cursor])
+    except Exception as e:
+        print(f"Error warming catalog cache: {e}")
+
+def catalog_response(request: Request, entry: dict, cache_control: str) -> Response:
+    headers = {"ETag": entry["etag"], "Cache-Control": cache_control}
+    if catalog.etag_matches(request.headers.get("if-none-match"), entry["etag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry["body"], media_type="application/json", headers=headers)
+
 @app.get("/domains/{admin_email}", response_model=list[DomainResponse])
 async def get_domains_by_admin(
     admin_email: str,
+    request: Request,
     current_user: User = Depends(get_current_user)
 ):
     """Get all domains created by a specific admin"""
     try:
-        # Verify the admin exists
-        admin = database.users.find_one({"email": admin_email, "role": "admin"})
-        if not admin:
-            raise HTTPException(status_code=404, detail="Admin not found")
-        
-        # Get domains using admin's email
-        domains = database.get_all_domains(admin_email)
-        return domains
-        
+        entry = await catalog.get(("domains", admin_email), lambda: build_domains(admin_email))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Admin not found")
+    # Behind auth, so only the browser may keep it, and must revalidate each time
+    return catalog_response(request, entry, "private, no-cache")
     
             
 # Question Management Endpoints
@@ -673,7 +911,7 @@ async def add_question(
     admin: User = Depends(get_current_admin)
 ):
     """Add a new question to a specific domain"""
-    question_id = database.add_question(
+    question_id = await database.add_question(
         question.domain_id, 
         question.text, 
         admin.email,
@@ -690,21 +928,22 @@ async def add_question(
     
     
 @app.get("/admin/questions", response_model=list[QuestionResponse])
-async def get_all_questions(admin: User = Depends(get_current_admin)):
+async def get_all_questions(
+    response: Response,
+    page: dict = Depends(page_params),
+    admin: User = Depends(get_current_admin)
+):
     """Get all questions for the current admin"""
-    questions = database.get_all_questions(admin.email)
-    return questions
+    questions = await database.get_all_questions(admin.email, **page)
+    return paged(response, questions, page["limit"])
 
 @app.get("/questions/{domain_id}", response_model=list[QuestionResponse])
-async def get_public_questions_by_domain(domain_id: str):
+async def get_public_questions_by_domain(domain_id: str, request: Request):
     """Get all questions for a specific domain (public endpoint)"""
-    print(f"Fetching questions for domain: {domain_id}")  # Add logging
-    questions = database.get_questions_by_domain(domain_id)
-    if questions is None:
-        print("No questions found or domain not found")  # Add logging
+    entry = await interview_bundle(domain_id)
+    if entry is None:
         raise HTTPException(status_code=404, detail="Domain not found")
-    print(f"Found {len(questions)} questions")  # Add logging
-    return questions
+    return catalog_response(request, entry, f"public, max-age={CATALOG_MAX_AGE_SECONDS}")
 
 @app.delete("/admin/questions/{question_id}")
 async def delete_question(
@@ -712,7 +951,7 @@ async def delete_question(
     admin: User = Depends(get_current_admin)
 ):
     """Delete a specific question"""
-    success = database.delete_question(question_id)
+    success = await database.delete_question(question_id)
     if not success:
         raise HTTPException(status_code=404, detail="Question not found")
     return {"message": "Question deleted successfully"}
@@ -726,7 +965,7 @@ async def submit_response(
     """Submit user response to a question with enhanced monitoring data"""
     try:
         # Validate question exists
-        question = database.questions.find_one({"_id": ObjectId(response.question_id)})
+        question = await database.questions.find_one({"_id": ObjectId(response.question_id)})
         if not question:
             raise HTTPException(
                 status_code=404,
@@ -739,13 +978,15 @@ async def submit_response(
             "user_id": current_user.username,
             "user_response": response.user_response,
             "test_log": response.test_log or [],
-            "photo": response.photo,
+            "photo_ref": await database.save_photo(response.photo) if response.photo else None,
             "created_at": datetime.utcnow()
         }
 
-        response_id = database.responses.insert_one(response_data).inserted_id
+        result = await database.responses.insert_one(response_data)
+        response_id = result.inserted_id
         
-        # If there's monitoring data, send to GPT for evaluation
+        # If there's monitoring data, queue it for evaluation by the workers
+        evaluation_status = None
         if response.test_log or response.photo:
             evaluation_data = {
                 "question": question.get("text", ""),
@@ -755,14 +996,31 @@ async def submit_response(
                 "photo_metadata": "present" if response.photo else "none"
             }
             
-            gpt_evaluation = gemini_api.evaluate_enhanced_response(evaluation_data)
-            
-            database.save_evaluation(
-                response_id=str(response_id),
-                evaluation=gpt_evaluation
-            )
+            try:
+                await evaluation_queue.enqueue(str(response_id), evaluation_data)
+            except Exception as e:
+                # Don't leave a response that will never be evaluated: undo the
+                # insert so the client's retry starts from a clean slate
+                print(f"Error queueing evaluation for response {response_id}: {e}")
+                try:
+                    await database.responses.delete_one({"_id": response_id})
+                except Exception as e:
+                    print(f"Error removing unqueued response {response_id}: {e}")
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Could not queue the response for evaluation, please try again"
+                )
+            evaluation_status = "pending"
+        if response_data["photo_ref"]:
+            thumbnails.schedule(response_data["photo_ref"]["photo_id"])
             
-        return {"message": "Response submitted successfully"}
+        return {
+            "message": "Response submitted successfully",
+            "response_id": str(response_id),
+            "evaluation_status": evaluation_status
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error submitting response: {str(e)}")
         raise HTTPException(
@@ -771,22 +1029,87 @@ async def submit_response(
         )
         
         
+@app.get("/user/evaluations/{response_id}")
+async def get_evaluation_status(
+    response_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Get the evaluation job status (and result, once done) for a response"""
+    try:
+        response = await database.responses.find_one({"_id": ObjectId(response_id)}, {"user_id": 1})
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid response ID format")
+    if not response:
+        raise HTTPException(status_code=404, detail="Response not found")
+    if response["user_id"] != current_user.username and current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You can only view your own evaluations"
+        )
+    
+    job_status = await evaluation_queue.get_status(response_id)
+    if not job_status:
+        raise HTTPException(status_code=404, detail="No evaluation queued for this response")
+    return job_status
+
+@app.get("/responses/{response_id}/photo")
+async def get_response_photo(
+    response_id: str,
+    variant: str = Query("full", pattern="^(full|preview)$"),
+    current_user: User = Depends(get_current_user)
+):
+    """Get the proctoring photo submitted with a response (full size or a 320x240 preview)"""
+    try:
+        response = await database.responses.find_one(
+            {"_id": ObjectId(response_id)},
+            {"user_id": 1, "photo_ref": 1, "photo": 1}
+        )
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid response ID format")
+    if not response:
+        raise HTTPException(status_code=404, detail="Response not found")
+    if response["user_id"] != current_user.username and current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You can only view your own photos"
+        )
+    
+    photo = None
+    photo_ref = response.get("photo_ref")
+    if photo_ref and variant == "preview" and photo_ref.get("preview_id"):
+        photo = await database.load_photo(photo_ref["preview_id"])
+    elif photo_ref:
+        photo = await database.load_photo(photo_ref["photo_id"])
+    elif response.get("photo"):
+        # Responses stored before photos moved to GridFS keep them inline
+        photo = database.decode_photo(response["photo"])
+    if not photo:
+        raise HTTPException(status_code=404, detail="No photo for this response")
+    
+    content_type, data = photo
+    return Response(
+        content=data,
+        media_type=content_type,
+        headers={"Cache-Control": "private, max-age=86400, immutable"}
+    )
+
 @app.get("/admin/responses", response_model=list[UserResponseResponse])
-async def get_all_responses(admin: User = Depends(get_current_admin)):
+async def get_all_responses(
+    response: Response,
+    page: dict = Depends(page_params),
+    with_question: bool = Query(True, description="Join the question text"),
+    with_evaluation: bool = Query(True, description="Join the latest evaluation score"),
+    admin: User = Depends(get_current_admin)
+):
     """Get all user responses for the current admin's questions"""
     try:
-        # Get all questions by this admin first
-        admin_questions = database.get_all_questions(admin.email)
-        question_ids = [q["id"] for q in admin_questions]
-        
-        # Then get all responses for these questions
-        responses = []
-        for qid in question_ids:
-            q_responses = database.get_responses_by_question(qid)
-            if q_responses:
-                responses.extend(q_responses)
-                
-        return responses
+        responses = await database.get_admin_responses_joined(
+            admin.email,
+            with_question=with_question,
+            with_evaluation=with_evaluation,
+            **page
+        )
+        return paged(response, responses, page["limit"])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -796,31 +1119,85 @@ async def get_responses_by_question(
     admin: User = Depends(get_current_admin)
 ):
     """Get all user responses for a specific question"""
-    responses = database.get_responses_by_question(question_id)
+    responses = await database.get_responses_by_question(question_id)
     if responses is None:
         raise HTTPException(status_code=404, detail="Question not found")
     return responses
 
+EXPORT_COLUMNS = [
+    "id", "user_id", "question_id", "domain_id", "question_text", "user_response",
+    "created_at", "evaluation_score", "evaluation_feedback", "analysis_score", "analysis_feedback"
+]
+
+async def export_ndjson(rows):
+    chunk = []
+    async for row in rows:
+        chunk.append(json.dumps(row, default=str))
+        if len(chunk) >= EXPORT_BATCH_SIZE:
+            yield "\n".join(chunk) + "\n"
+            chunk = []
+    if chunk:
+        yield "\n".join(chunk) + "\n"
+
+async def export_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    count = 0
+    async for row in rows:
+        writer.writerow(row)
+        count += 1
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+@app.get("/admin/export-responses")
+async def export_responses(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    domain_id: Optional[str] = None,
+    admin_email: Optional[str] = Query(None, description="Only responses to this admin's questions"),
+    since: Optional[datetime] = Query(None, description="Responses created at or after this time"),
+    until: Optional[datetime] = Query(None, description="Responses created before this time"),
+    admin: User = Depends(get_current_admin)
+):
+    """Stream responses joined with their evaluation and interview analysis as
+    NDJSON or CSV, straight from a Mongo cursor"""
+    # Only the default admin may export other admins' responses
+    if admin.email != DEFAULT_ADMIN_EMAIL:
+        admin_email = admin.email
+
+    rows = database.iter_response_export(
+        domain_id=domain_id,
+        admin_email=admin_email,
+        since=since,
+        until=until,
+        batch_size=EXPORT_BATCH_SIZE
+    )
+    filename = f"responses-{datetime.utcnow():%Y%m%d-%H%M%S}.{format}"
+    return StreamingResponse(
+        export_csv(rows) if format == "csv" else export_ndjson(rows),
+        media_type="text/csv" if format == "csv" else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @app.get("/user/my-responses", response_model=list[UserResponseResponse])
-async def get_user_responses(current_user: User = Depends(get_current_user)):
+async def get_user_responses(
+    response: Response,
+    page: dict = Depends(page_params),
+    current_user: User = Depends(get_current_user)
+):
     """Get all responses submitted by the current user"""
-    responses = database.get_responses_by_user(current_user.username)
-    return responses
+    responses = await database.get_responses_by_user(current_user.username, **page)
+    return paged(response, responses, page["limit"])
 
 # Public endpoints
 @app.get("/domains", response_model=list[DomainResponse])
-async def get_public_domains():
+async def get_public_domains(request: Request):
     """Get all available domains (public endpoint)"""
-    domains = database.get_all_domains()
-    return domains
-
-@app.get("/questions/{domain_id}", response_model=list[QuestionResponse])
-async def get_public_questions_by_domain(domain_id: str):
-    """Get all questions for a specific domain (public endpoint)"""
-    questions = database.get_questions_by_domain(domain_id)
-    if questions is None:
-        raise HTTPException(status_code=404, detail="Domain not found")
-    return questions
+    entry = await catalog.get(("domains", None), build_domains)
+    return catalog_response(request, entry, f"public, max-age={CATALOG_MAX_AGE_SECONDS}")
 
 class InterviewCompleteRequest(BaseModel):
     answers: list[UserResponseCreate]
@@ -832,27 +1209,49 @@ async def complete_interview(
 ):
     """Submit all interview answers at once"""
     try:
+        questions = await asyncio.gather(
+            *(database.get_question_by_id(a.question_id) for a in request.answers)
+        )
+
+        # Evaluate all answers with batched Gemini requests
+        items = [
+            {"id": str(i), "question": question["text"], "answer": answer.user_response}
+            for i, (answer, question) in enumerate(zip(request.answers, questions))
+            if question
+        ]
+        evaluations = dict(zip(
+            (item["id"] for item in items),
+            await gemini_api.evaluate_answers(items)
+        ))
+
         # Save all responses
         for answer in request.answers:
-            database.add_user_response(
+            await database.add_user_response(
                 question_id=answer.question_id,
                 user_id=current_user.username,
                 user_response=answer.user_response
             )
         
-        # Generate a simple report (you can enhance this)
+        detailed_feedback = []
+        scores = []
+        for i, (answer, question) in enumerate(zip(request.answers, questions)):
+            evaluation = evaluations.get(str(i), {"error": "Question not found"})
+            feedback = {
+                "question": question["text"] if question else None,
+                "response": answer.user_response
+            }
+            if "error" in evaluation:
+                feedback["error"] = evaluation["error"]
+            else:
+                feedback["score"] = evaluation["score"]
+                feedback["feedback"] = evaluation["feedback"]
+                scores.append(evaluation["score"])
+            detailed_feedback.append(feedback)
+        
         report = {
             "total_questions": len(request.answers),
-            "average_score": 7.5,  # Replace with actual scoring logic
-            "detailed_feedback": [
-                {
-                    "question": "Sample question",  # Get actual question text
-                    "response": answer.user_response,
-                    "score": 8,  # Replace with actual scoring
-                    "feedback": "Good answer!"  # Replace with actual feedback
-                }
-                for answer in request.answers
-            ]
+            "average_score": sum(scores) / len(scores) if scores else 0,
+            "detailed_feedback": detailed_feedback
         }
         return report
     except Exception as e:
@@ -863,13 +1262,7 @@ async def complete_interview(
 async def get_admin_users(current_user: User = Depends(get_current_user)):  # Changed from get_current_admin
     """Get all admin users (accessible to all authenticated users)"""
     try:
-        users = list(database.users.find({"role": "admin"}))
-        for user in users:
-            user["id"] = str(user["_id"])
-            del user["_id"]
-            del user["password_hash"]
-            user["verified"] = user.get("verified", False)
-        return users
+        return await database.list_users({"role": "admin"})
     except Exception as e:
         print(f"Error getting admin users: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -877,22 +1270,21 @@ async def get_admin_users(current_user: User = Depends(get_current_user)):  # Ch
 # Add this to app.py
 # In app.py, modify the get_all_users endpoint
 @app.get("/admin/all-users", response_model=list[User])
-async def get_all_users(admin: User = Depends(get_current_admin)):
+async def get_all_users(
+    response: Response,
+    page: dict = Depends(page_params),
+    admin: User = Depends(get_current_admin)
+):
     """Get all non-admin users (excluding users with pending admin requests)"""
     try:
-        users = list(database.users.find({
+        users = await database.list_users({
             "role": "user",
             "$or": [
                 {"admin_request_pending": {"$exists": False}},
                 {"admin_request_pending": False}
             ]
-        }))
-        for user in users:
-            user["id"] = str(user["_id"])
-            del user["_id"]
-            del user["password_hash"]
-            user["verified"] = user.get("verified", False)
-        return users
+        }, **page)
+        return paged(response, users, page["limit"])
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal server error")
 
@@ -916,7 +1308,7 @@ async def delete_domain(
             )
 
         # First verify the domain exists and belongs to this admin
-        domain = database.domains.find_one({
+        domain = await database.domains.find_one({
             "_id": domain_obj_id,
             "created_by": admin.email
         })
@@ -928,7 +1320,7 @@ async def delete_domain(
             )
 
         # Delete the domain
-        success = database.delete_domain(domain_obj_id)
+        success = await database.delete_domain(domain_obj_id)
         if not success:
             raise HTTPException(
                 status_code=500,
@@ -950,9 +1342,10 @@ async def delete_user(
     admin: User = Depends(get_current_admin)
 ):
     """Delete a user by email"""
-    result = database.users.delete_one({"email": email})
+    result = await database.users.delete_one({"email": email})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
+    invalidate_principal(email=email)
     return {"message": "User deleted successfully"}
 
 class CurrentUserResponse(BaseModel):
@@ -963,7 +1356,7 @@ class CurrentUserResponse(BaseModel):
 
 @app.get("/current-user", response_model=CurrentUserResponse)
 async def get_current_user_details(current_user: User = Depends(get_current_user)):
-    user = database.users.find_one({"username": current_user.username})
+    user = await database.users.find_one({"username": current_user.username})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -974,27 +1367,75 @@ async def get_current_user_details(current_user: User = Depends(get_current_user
         "verified": user.get("verified", False)
     }
     
-@app.post("/admin/bulk-add-questions")
+@app.post("/admin/bulk-add-questions", response_model=BulkQuestionsResult)
 async def bulk_add_questions(
-    request: dict,
+    request: BulkQuestionsCreate,
     admin: User = Depends(get_current_admin)
 ):
-    """Add multiple questions at once"""
+    """Add many questions at once; texts already in their domain are skipped"""
     try:
-        question_ids = []
-        for question_data in request["questions"]:
-            question_id = database.add_question(
-                question_data["domain_id"],
-                question_data["text"],
-                request["admin_email"]
-            )
-            if question_id:
-                question_ids.append(str(question_id))
-        
-        return {"message": f"Added {len(question_ids)} questions", "ids": question_ids}
+        results = await database.bulk_add_questions(
+            [item.dict() for item in request.questions],
+            admin.email,
+            chunk_size=QUESTION_INSERT_CHUNK_SIZE
+        )
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
     
+    counts = {status: sum(r["status"] == status for r in results) for status in ("created", "duplicate", "failed")}
+    return {
+        "message": f"Added {counts['created']} questions",
+        "ids": [r["id"] for r in results if r["status"] == "created"],
+        **counts,
+        "results": results
+    }
+    
+@app.post("/admin/import-questions-pdf", status_code=status.HTTP_202_ACCEPTED)
+async def import_questions_pdf(
+    file: UploadFile = File(...),
+    domain_id: str = Form(...),
+    time_limit: int = Form(60),
+    admin: User = Depends(get_current_admin)
+):
+    """Start importing questions from a PDF; poll the returned import for progress"""
+    if not await database.get_domain_by_id(domain_id):
+        raise HTTPException(status_code=404, detail="Domain not found")
+    if time_limit <= 0:
+        raise HTTPException(status_code=400, detail="Time limit must be positive")
+    
+    # Spool the upload to disk in chunks so large PDFs never sit in memory
+    max_bytes = MAX_PDF_UPLOAD_MB * 1024 * 1024
+    size = 0
+    # Disk writes go to a thread so a slow disk never stalls the event loop
+    spool = await asyncio.to_thread(tempfile.NamedTemporaryFile, suffix=".pdf", delete=False)
+    try:
+        try:
+            while chunk := await file.read(1024 * 1024):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(status_code=413, detail=f"PDF larger than {MAX_PDF_UPLOAD_MB} MB")
+                await asyncio.to_thread(spool.write, chunk)
+        finally:
+            await asyncio.to_thread(spool.close)
+        import_id = await pdf_import.create(domain_id, file.filename, admin.email, time_limit)
+    except Exception:
+        await asyncio.to_thread(os.remove, spool.name)
+        raise
+    
+    pdf_import.schedule(import_id, spool.name, domain_id, admin.email, time_limit)
+    return {"import_id": import_id, "status": "queued"}
+
+@app.get("/admin/import-questions-pdf/{import_id}")
+async def get_pdf_import_status(
+    import_id: str,
+    admin: User = Depends(get_current_admin)
+):
+    """Progress of a PDF import: pages parsed and questions created/skipped so far"""
+    result = await pdf_import.get_status(import_id)
+    if not result:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return result
+
 @app.get("/verify-token")
 async def verify_token(current_user: User = Depends(get_current_user)):
     return {"valid": True, "role": current_user.role}
@@ -1008,10 +1449,13 @@ async def analyze_interview(
     """Analyze interview responses using Gemini API"""
     try:
         # Send data to Gemini API for analysis
-        analysis = gemini_api.analyze_interview_responses(interview_data)
+        analysis = await evaluation_cache.get_or_compute(
+            gemini_api.analysis_cache_key(interview_data),
+            lambda: gemini_api.analyze_interview_responses_async(interview_data)
+        )
         
         # Save the analysis to database
-        database.save_interview_analysis(
+        await database.save_interview_analysis(
             user_id=current_user.username,
             interview_data=interview_data,
             analysis=analysis
@@ -1024,6 +1468,70 @@ async def analyze_interview(
             detail=f"Error analyzing interview: {str(e)}"
         )
         
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@app.post("/analyze-interview/stream")
+async def analyze_interview_stream(
+    interview_data: dict,
+    current_user: User = Depends(get_current_user)
+):
+    """Stream the interview analysis as Server-Sent Events: one "question" event per
+    analysed answer as soon as it is available, then a final "summary" event"""
+    cache_key = gemini_api.analysis_cache_key(interview_data, questions_first=True)
+
+    async def events():
+        analysis = await evaluation_cache.get(cache_key)
+        try:
+            if analysis is not None:
+                for item in analysis.get("questionAnalysis", []):
+                    yield sse_event("question", item)
+            else:
+                async for event, data in gemini_api.stream_interview_analysis(interview_data):
+                    if event == "summary":
+                        analysis = data
+                    else:
+                        yield sse_event(event, data)
+                await evaluation_cache.put(cache_key, analysis)
+        except Exception as e:
+            # Whatever arrived before the failure is incomplete: report it, but
+            # neither cache nor store it as the interview's analysis
+            yield sse_event("error", {"detail": f"Error analyzing interview: {str(e)}"})
+            yield sse_event("summary", gemini_api.analysis_error(e))
+            return
+        
+        await database.save_interview_analysis(
+            user_id=current_user.username,
+            interview_data=interview_data,
+            analysis=analysis
+        )
+        yield sse_event("summary", analysis)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/admin/mail-stats")
+async def get_mail_stats(admin: User = Depends(get_current_admin)):
+    """Delivery counters, queue depth and queue-to-delivery latency of the mailer"""
+    return mailer.stats()
+
+@app.get("/admin/cache-stats")
+async def get_cache_stats(admin: User = Depends(get_current_admin)):
+    """Sizes and hit rates of this worker's caches, and invalidation bus state"""
+    return {
+        "principals": principal_cache.stats(),
+        "catalog": catalog.stats(),
+        "invalidation_bus": invalidation_bus.stats()
+    }
+
+@app.get("/admin/evaluation-cache-stats")
+async def get_evaluation_cache_stats(admin: User = Depends(get_current_admin)):
+    """Hit/miss counters for the Gemini evaluation cache"""
+    return evaluation_cache.stats()
+
 @app.get("/admin/admin-users", response_model=list[User])
 async def get_admin_users(current_user: User = Depends(get_current_user)):
     """Get all admin users (only accessible to default admin)"""
@@ -1036,13 +1544,7 @@ async def get_admin_users(current_user: User = Depends(get_current_user)):
             )
         
         # Get all admin users
-        users = list(database.users.find({"role": "admin"}))
-        for user in users:
-            user["id"] = str(user["_id"])
-            del user["_id"]
-            del user["password_hash"]
-            user["verified"] = user.get("verified", False)
-        return users
+        return await database.list_users({"role": "admin"})
     except Exception as e:
         print(f"Error getting admin users: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -1072,7 +1574,7 @@ async def delete_admin_post(
             )
             
         # Delete the post
-        result = database.admin_posts.delete_one({"_id": post_obj_id})
+        result = await database.admin_posts.delete_one({"_id": post_obj_id})
         if result.deleted_count == 0:
             raise HTTPException(
                 status_code=404,
@@ -0,0 +1,34 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# The event loop only keeps weak references to tasks, so fire-and-forget work
+# is held here until it finishes
+pending = set()
+
+
+def schedule(coro):
+    """Run coro in the background without blocking the caller"""
+    task = asyncio.get_running_loop().create_task(coro)
+    pending.add(task)
+    task.add_done_callback(pending.discard)
+    return task
+
+
+class ProcessPool:
+    """A ProcessPoolExecutor for CPU-bound work, created on first use so that
+    importing a module never starts processes"""
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self.executor = None
+
+    def get(self):
+        if self.executor is None:
+            # Spawn rather than fork: by now this process has Motor and executor
+            # threads whose locks a forked child could inherit mid-acquire
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self.executor
@@ -0,0 +1,91 @@
+import hashlib
+import json
+import invalidation_bus
+from cache import TTLCache
+from config import CATALOG_CACHE_SIZE, CATALOG_CACHE_TTL_SECONDS
+
+# Serialized domain and question listings, keyed by ("domains", admin_email or None)
+# or ("questions", domain_id). Entries are dropped on every write that changes
+# them, in this worker and (through invalidation_bus) in every other one; the TTL
+# is only a backstop.
+entries = TTLCache(maxsize=CATALOG_CACHE_SIZE, ttl=CATALOG_CACHE_TTL_SECONDS)
+# Bumped on every invalidation so a build that raced with a write is not cached
+version = 0
+
+
+def make_entry(data):
+    body = json.dumps(data, default=str, separators=(",", ":")).encode("utf-8")
+    return {"body": body, "etag": '"' + hashlib.sha256(body).hexdigest()[:32] + '"'}
+
+
+async def get(key, build):
+    """Cached {"body", "etag"} for key, building it from `await build()` on a miss.
+    Returns None (and caches nothing) when build() returns None."""
+    async def build_entry():
+        data = await build()
+        return None if data is None else make_entry(data)
+    return await get_entry(key, build_entry)
+
+
+async def get_entry(key, build_entry):
+    """Like get(), for builders that already return a serialized {"body", "etag"}"""
+    entry = entries.get(key)
+    if entry is not None:
+        return entry
+    started_at = version
+    entry = await build_entry()
+    if entry is None:
+        return None
+    entry = {"body": entry["body"], "etag": entry["etag"]}
+    if version == started_at:
+        entries.set(key, entry)
+    return entry
+
+
+def invalidate_domains():
+    invalidation_bus.publish("domains")
+
+
+def invalidate_questions(domain_id):
+    invalidation_bus.publish("questions", str(domain_id))
+
+
+# Local handlers, subscribed to the bus by app.py
+
+def drop_domains(_=None):
+    global version
+    version += 1
+    entries.invalidate_where(lambda key, value: key[0] == "domains")
+
+
+def drop_questions(domain_id):
+    global version
+    version += 1
+    entries.pop(("questions", domain_id))
+
+
+def drop_admin(user):
+    """A user was deleted or changed role: their per-admin domain list may be wrong"""
+    global version
+    version += 1
+    entries.pop(("domains", user.get("email")))
+
+
+def clear():
+    global version
+    version += 1
+    entries.clear()
+
+
+def etag_matches(if_none_match, etag):
+    """Weak comparison of an If-None-Match header against our ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return etag in tags or f"W/{etag}" in tags
+
+
+def stats():
+    return {**entries.stats(), "version": version}
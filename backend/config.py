@@ -9,6 +9,18 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 
+# Password hashing pool (bcrypt runs off the event loop)
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", 4))
+HASH_QUEUE_SIZE = int(os.getenv("HASH_QUEUE_SIZE", 64))
+
+# Keyset pagination for list endpoints
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", 50))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 200))
+
+# Resolved-principal cache for get_current_user
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", 10000))
+PRINCIPAL_CACHE_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", 60))
+
 # Database
 MONGO_URI = os.getenv("MONGO_URI")
 DB_NAME = os.getenv("DB_NAME", "interview_practice")
@@ -28,4 +40,80 @@ EMAIL_FROM = os.getenv("EMAIL_FROM")
 DEFAULT_ADMIN_EMAIL = os.getenv("DEFAULT_ADMIN_EMAIL")
 DEFAULT_ADMIN_PASSWORD = os.getenv("DEFAULT_ADMIN_PASSWORD")
 
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
\ No newline at end of file
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+# "gemini" for the real API, "fake" for a local stand-in model
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+
+# Gemini gateway: quota, timeouts, retries and circuit breaker
+GEMINI_RATE_PER_MINUTE = int(os.getenv("GEMINI_RATE_PER_MINUTE", 60))
+GEMINI_BURST = int(os.getenv("GEMINI_BURST", 10))
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", 60))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", 3))
+GEMINI_BREAKER_THRESHOLD = int(os.getenv("GEMINI_BREAKER_THRESHOLD", 5))
+GEMINI_BREAKER_RESET_SECONDS = float(os.getenv("GEMINI_BREAKER_RESET_SECONDS", 30))
+
+# Max Gemini evaluations in flight per complete-interview request
+EVALUATION_CONCURRENCY = int(os.getenv("EVALUATION_CONCURRENCY", 5))
+# Question/answer pairs packed into one batched evaluation request
+EVALUATION_BATCH_SIZE = int(os.getenv("EVALUATION_BATCH_SIZE", 5))
+
+# Gemini evaluation cache (in-memory LRU in front of a Mongo collection)
+EVAL_CACHE_MEMORY_SIZE = int(os.getenv("EVAL_CACHE_MEMORY_SIZE", 2048))
+EVAL_CACHE_MAX_DOCS = int(os.getenv("EVAL_CACHE_MAX_DOCS", 100000))
+EVAL_CACHE_TTL_SECONDS = int(os.getenv("EVAL_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+
+# Evaluation job queue and workers
+EVAL_JOB_LEASE_SECONDS = int(os.getenv("EVAL_JOB_LEASE_SECONDS", 120))
+EVAL_JOB_MAX_ATTEMPTS = int(os.getenv("EVAL_JOB_MAX_ATTEMPTS", 5))
+EVAL_WORKER_CONCURRENCY = int(os.getenv("EVAL_WORKER_CONCURRENCY", 4))
+EVAL_WORKER_POLL_SECONDS = float(os.getenv("EVAL_WORKER_POLL_SECONDS", 1))
+
+# Process pool for proctoring photo thumbnails
+THUMBNAIL_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", 2))
+
+# Rows fetched from Mongo (and flushed to the client) per chunk during exports
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+
+# Bulk question ingestion
+MAX_BULK_QUESTIONS = int(os.getenv("MAX_BULK_QUESTIONS", 10000))
+QUESTION_INSERT_CHUNK_SIZE = int(os.getenv("QUESTION_INSERT_CHUNK_SIZE", 1000))
+
+# PDF question import: worker processes, pages parsed per task, upload size cap
+PDF_IMPORT_WORKERS = int(os.getenv("PDF_IMPORT_WORKERS", 2))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", 10))
+MAX_PDF_UPLOAD_MB = int(os.getenv("MAX_PDF_UPLOAD_MB", 50))
+# An import that has made no progress for this long lost its worker and is marked failed
+PDF_IMPORT_STALE_SECONDS = int(os.getenv("PDF_IMPORT_STALE_SECONDS", 600))
+
+# Outbound mail: pooled SMTP sessions fed from an in-process queue
+# (set SMTP_STARTTLS=false and leave SMTP_USERNAME empty for a local SMTP sink)
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", 2))
+SMTP_IDLE_SECONDS = float(os.getenv("SMTP_IDLE_SECONDS", 60))
+MAIL_QUEUE_SIZE = int(os.getenv("MAIL_QUEUE_SIZE", 1000))
+MAIL_MAX_RETRIES = int(os.getenv("MAIL_MAX_RETRIES", 3))
+
+# Announcement email fan-out: recipients per message, overall send rate, lease
+ANNOUNCEMENT_BATCH_SIZE = int(os.getenv("ANNOUNCEMENT_BATCH_SIZE", 50))
+ANNOUNCEMENT_RATE_PER_MINUTE = int(os.getenv("ANNOUNCEMENT_RATE_PER_MINUTE", 600))
+ANNOUNCEMENT_LEASE_SECONDS = int(os.getenv("ANNOUNCEMENT_LEASE_SECONDS", 120))
+# Fan-out has its own SMTP threads so a large announcement can't hold up OTP emails;
+# a failed batch is retried this many times, and expired leases are swept this often
+ANNOUNCEMENT_WORKERS = int(os.getenv("ANNOUNCEMENT_WORKERS", 2))
+ANNOUNCEMENT_BATCH_RETRIES = int(os.getenv("ANNOUNCEMENT_BATCH_RETRIES", 3))
+ANNOUNCEMENT_SWEEP_SECONDS = int(os.getenv("ANNOUNCEMENT_SWEEP_SECONDS", 60))
+
+# Domain/question catalog cache and the browser/CDN max-age for public listings
+CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", 1024))
+CATALOG_CACHE_TTL_SECONDS = int(os.getenv("CATALOG_CACHE_TTL_SECONDS", 300))
+CATALOG_MAX_AGE_SECONDS = int(os.getenv("CATALOG_MAX_AGE_SECONDS", 60))
+# Background warm-up after boot: at most this many domain bundles, built this many at a time
+CATALOG_WARM_DOMAINS = int(os.getenv("CATALOG_WARM_DOMAINS", 50))
+CATALOG_WARM_CONCURRENCY = int(os.getenv("CATALOG_WARM_CONCURRENCY", 4))
+
+# Cross-worker cache invalidation: poll interval when change streams are unavailable
+INVALIDATION_POLL_SECONDS = float(os.getenv("INVALIDATION_POLL_SECONDS", 2))
+# How long a skipped sequence number may stay missing (a publisher committing late)
+# before the worker assumes the event was lost and flushes its caches
+INVALIDATION_GAP_GRACE_SECONDS = float(os.getenv("INVALIDATION_GAP_GRACE_SECONDS", 5))
@@ -1,159 +1,470 @@
 from urllib.parse import quote_plus
 from bson import ObjectId
-from pymongo import MongoClient, ASCENDING, IndexModel
-from pymongo.errors import OperationFailure, CollectionInvalid
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorGridFSBucket
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure, CollectionInvalid, DuplicateKeyError, BulkWriteError
 from passlib.context import CryptContext
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+import asyncio
+import base64
+import hashlib
+import json
 import os
 import random
 import string
+import zlib
+import catalog
 from config import (
     MONGO_URI, DB_NAME, 
-    DEFAULT_ADMIN_EMAIL, DEFAULT_ADMIN_PASSWORD
+    DEFAULT_ADMIN_EMAIL, DEFAULT_ADMIN_PASSWORD,
+    HASH_WORKERS, HASH_QUEUE_SIZE
 )
 
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt releases the GIL, so a small thread pool keeps hashing off the event
+# loop. At most HASH_WORKERS + HASH_QUEUE_SIZE calls may be running or queued;
+# beyond that callers are turned away instead of piling up.
+hash_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="pwd-hash")
+hash_in_flight = 0
+
+class HashPoolBusy(Exception):
+    """Every password-hashing slot is taken; the request should be retried later"""
+
+async def run_in_hash_pool(func, *args):
+    global hash_in_flight
+    if hash_in_flight >= HASH_WORKERS + HASH_QUEUE_SIZE:
+        raise HashPoolBusy("Too many password checks in progress")
+    hash_in_flight += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(hash_executor, func, *args)
+    finally:
+        hash_in_flight -= 1
+
 # MongoDB Connection
-try:
-    client = MongoClient(os.getenv("MONGO_URI", MONGO_URI))
-    db = client[os.getenv("DB_NAME", DB_NAME)]
-    print("✅ Connected to MongoDB")
-except Exception as e:
-    print(f"❌ MongoDB connection failed: {e}")
-    raise
+# The client is created on first use rather than at import, so importing this
+# module opens no sockets or threads and is safe before gunicorn forks workers.
+_client = None
+_db = None
+_photos = None
+
+def get_db():
+    global _client, _db
+    if _db is None:
+        try:
+            _client = AsyncIOMotorClient(os.getenv("MONGO_URI", MONGO_URI))
+            _db = _client[os.getenv("DB_NAME", DB_NAME)]
+            print("✅ Connected to MongoDB")
+        except Exception as e:
+            print(f"❌ MongoDB connection failed: {e}")
+            raise
+    return _db
+
+class LazyHandle:
+    """Stands in for the database, a collection or a bucket until first use"""
+
+    def __init__(self, resolve):
+        self._resolve = resolve
 
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __getitem__(self, name):
+        return self._resolve()[name]
+
+def collection(name):
+    return LazyHandle(lambda: get_db()[name])
+
+db = LazyHandle(get_db)
 
 # Collections
-users = db.users
-otps = db.otps
-admin_requests = db.admin_requests# In database.py, make sure this is at the top level with other collections
-evaluations = db.evaluations
+users = collection("users")
+otps = collection("otps")
+admin_requests = collection("admin_requests")
+evaluations = collection("evaluations")
+evaluation_cache = collection("evaluation_cache")
+evaluation_jobs = collection("evaluation_jobs")
+locks = collection("locks")
+pdf_imports = collection("pdf_imports")
+announcement_jobs = collection("announcement_jobs")
+invalidations = collection("invalidations")
+interview_bundles = collection("interview_bundles")
+counters = collection("counters")
 
 
-def save_evaluation(response_id, evaluation):
+async def run_once(name, func, version, hold_seconds=300):
+    """Run func() once per `version`, in only one worker. The first to take the
+    `name` lock runs it; workers booting meanwhile skip it, and once it succeeds
+    the completed version is recorded so later boots skip it too. hold_seconds
+    only bounds how long a worker that died mid-run keeps the lock.
+    Returns True if this process ran func."""
+    now = datetime.utcnow()
     try:
-        result = evaluations.insert_one({
-            "response_id": response_id,
-            "evaluation": evaluation,
-            "created_at": datetime.utcnow()
-        })
-        return result.inserted_id is not None
+        await locks.update_one(
+            {"_id": name, "completed_version": {"$ne": version}, "expires_at": {"$lt": now}},
+            {"$set": {"owner": f"{os.uname().nodename}:{os.getpid()}", "acquired_at": now,
+                      "expires_at": now + timedelta(seconds=hold_seconds)}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # Already done for this version, or someone else holds an unexpired lock
+        return False
+    try:
+        await func()
+    except Exception:
+        # Let the next worker to boot retry instead of skipping a failed run
+        await locks.delete_one({"_id": name})
+        raise
+    await locks.update_one(
+        {"_id": name},
+        {"$set": {"completed_version": version, "completed_at": datetime.utcnow()}}
+    )
+    return True
+
+
+async def save_evaluation(response_id, evaluation):
+    """Store the evaluation for a response, replacing any earlier one, so a job
+    that ran twice still leaves a single row"""
+    try:
+        await evaluations.replace_one(
+            {"response_id": response_id},
+            {
+                "response_id": response_id,
+                "evaluation": evaluation,
+                "created_at": datetime.utcnow()
+            },
+            upsert=True
+        )
+        return True
     except Exception as e:
         print(f"Error saving evaluation: {e}")
         return False
 
+# Listing projections: "summary" keeps list pages lean, "full" returns whole
+# documents. password_hash is never returned from a user listing.
+USER_PROJECTIONS = {
+    "summary": {"username": 1, "email": 1, "role": 1, "verified": 1, "created_at": 1},
+    "full": {"password_hash": 0}
+}
+QUESTION_PROJECTIONS = {
+    "summary": {"domain_id": 1, "text": 1, "time_limit": 1, "created_at": 1},
+    "full": None
+}
+RESPONSE_PROJECTIONS = {
+    "summary": {"question_id": 1, "user_id": 1, "user_response": 1, "created_at": 1, "photo_ref.thumbnail": 1},
+    "full": None
+}
+# Names a client may pass as an explicit `fields` list
+QUESTION_FIELDS = {"domain_id", "text", "time_limit", "created_at", "created_by"}
+RESPONSE_FIELDS = {"question_id", "user_id", "user_response", "test_log", "created_at",
+                   "photo_ref", "photo_ref.thumbnail"}
+
+def listing_projection(projections, mode="summary", fields=None):
+    """Mongo projection for a listing; an explicit `fields` list wins over the mode"""
+    if fields:
+        # created_at is always needed to build the next page cursor
+        return {**{field: 1 for field in fields if field != "password_hash"}, "created_at": 1}
+    if mode not in projections:
+        raise ValueError(f"Unknown listing mode: {mode}")
+    return projections[mode]
+
+def projected(projection, field):
+    """True if a listing projection returns `field` (or part of it)"""
+    if projection is None:
+        return True
+    if any(value == 0 for value in projection.values()):
+        return projection.get(field) != 0
+    return any(key == field or key.startswith(field + ".") for key in projection)
+
+# Keyset pagination: pages are ordered newest first by (created_at, _id) and the
+# opaque cursor encodes the sort key of the last item on the previous page.
+def encode_cursor(item):
+    created_at = item.get("created_at")
+    payload = {
+        "t": created_at.isoformat() if isinstance(created_at, datetime) else None,
+        "id": str(item.get("id", item.get("_id")))
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor):
+    """Returns (created_at, ObjectId); raises ValueError for malformed cursors"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        created_at = datetime.fromisoformat(payload["t"]) if payload["t"] else None
+        return created_at, ObjectId(payload["id"])
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def after_cursor(query, cursor):
+    if cursor is None:
+        return query
+    created_at, last_id = cursor
+    if created_at is None:
+        # Documents without created_at sort last, ordered by _id alone
+        keyset = {"created_at": None, "_id": {"$lt": last_id}}
+    else:
+        keyset = {"$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": last_id}},
+            {"created_at": None}
+        ]}
+    return {"$and": [query, keyset]} if query else keyset
+
+async def find_page(collection, query, projection=None, limit=None, cursor=None):
+    """Run a listing query; with a limit, fetch one extra document so next_page
+    can tell whether another page exists"""
+    if limit is None:
+        return await collection.find(query, projection).to_list(length=None)
+    return await collection.find(after_cursor(query, cursor), projection) \
+        .sort([("created_at", -1), ("_id", -1)]) \
+        .limit(limit + 1) \
+        .to_list(length=None)
+
+def next_page(items, limit):
+    """Returns (page items, next_cursor or None) for a find_page result"""
+    if limit is None or len(items) <= limit:
+        return items, None
+    items = items[:limit]
+    return items, encode_cursor(items[-1])
+
 # User Management
-def get_password_hash(password):
-    return pwd_context.hash(password)
+async def get_password_hash(password):
+    return await run_in_hash_pool(pwd_context.hash, password)
+
+async def verify_password(plain_password, hashed_password):
+    return await run_in_hash_pool(pwd_context.verify, plain_password, hashed_password)
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_and_update_password(plain_password, hashed_password):
+    """Returns (valid, new_hash); new_hash is set when the stored hash is outdated"""
+    return await run_in_hash_pool(pwd_context.verify_and_update, plain_password, hashed_password)
 
 # In database.py, update the create_user function
-def create_user(username, email, password, role="user"):
+async def create_user(username, email, password=None, role="user", password_hash=None):
     try:
         # Check for existing email (new requirement)
-        if users.find_one({"email": email}):
+        if await users.find_one({"email": email}):
             return None
 
         user = {
             "username": username,
             "email": email,
-            "password_hash": get_password_hash(password),
+            "password_hash": password_hash or await get_password_hash(password),
             "role": role,
             "created_at": datetime.utcnow()
         }
-        return users.insert_one(user).inserted_id
+        result = await users.insert_one(user)
+        return result.inserted_id
+    except HashPoolBusy:
+        raise
     except Exception as e:
         print(f"Error creating user: {e}")
         return None    
     
-def create_collections():
-    collections_config = {
-        "users": {
-            "indexes": [
-                {"name": "unique_username", "key": [("username", ASCENDING)], "unique": True},
-                {"name": "unique_email", "key": [("email", ASCENDING)], "unique": True},
-                {"name": "role_index", "key": [("role", ASCENDING)]}
-            ],
-            "validator": {
-                "$jsonSchema": {
-                    "bsonType": "object",
-                    "required": ["username", "email", "password_hash", "role"],
-                    "properties": {
-                        "username": {"bsonType": "string"},
-                        "email": {"bsonType": "string"},
-                        "password_hash": {"bsonType": "string"},
-                        "role": {"bsonType": "string", "enum": ["admin", "user"]},
-                        "verified": {"bsonType": "bool"},
-                        "created_at": {"bsonType": "date"}
-                    }
+# Declarative index spec: every query path has an index here. create_collections
+# diffs it against index_information() and only builds what is missing or changed.
+INDEX_OPTIONS = ("unique", "partialFilterExpression", "expireAfterSeconds")
+
+COLLECTIONS = {
+    "users": {
+        "indexes": [
+            {"name": "unique_username", "key": [("username", ASCENDING)], "unique": True},
+            {"name": "unique_email", "key": [("email", ASCENDING)], "unique": True},
+            {"name": "role_index", "key": [("role", ASCENDING)]},
+            {"name": "role_page_index", "key": [("role", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]}
+        ],
+        "validator": {
+            "$jsonSchema": {
+                "bsonType": "object",
+                "required": ["username", "email", "password_hash", "role"],
+                "properties": {
+                    "username": {"bsonType": "string"},
+                    "email": {"bsonType": "string"},
+                    "password_hash": {"bsonType": "string"},
+                    "role": {"bsonType": "string", "enum": ["admin", "user"]},
+                    "verified": {"bsonType": "bool"},
+                    "created_at": {"bsonType": "date"}
                 }
             }
-        },
-        "admin_requests": {
-            "indexes": [
-                {"name": "unique_pending_email", "key": [("email", ASCENDING)], 
-                 "unique": True, 
-                 "partialFilterExpression": {"status": "pending"}},
-                {"name": "status_index", "key": [("status", ASCENDING)]}
-            ]
-        },
-        "otps": {
-            "indexes": [
-                {"name": "otp_email_index", "key": [("email", ASCENDING)]},
-                {"name": "otp_expiry_index", "key": [("expires_at", ASCENDING)]}
-            ]
         }
+    },
+    "admin_requests": {
+        "indexes": [
+            {"name": "unique_pending_email", "key": [("email", ASCENDING)], 
+             "unique": True, 
+             "partialFilterExpression": {"status": "pending"}},
+            {"name": "status_index", "key": [("status", ASCENDING)]}
+        ]
+    },
+    "otps": {
+        "indexes": [
+            {"name": "otp_email_index", "key": [("email", ASCENDING)]},
+            # Expired OTPs are purged an hour after expiry, leaving time to finish signup
+            {"name": "otp_expiry_index", "key": [("expires_at", ASCENDING)], "expireAfterSeconds": 3600}
+        ]
+    },
+    "domains": {
+        "indexes": [
+            {"name": "creator_index", "key": [("created_by", ASCENDING)]}
+        ]
+    },
+    "questions": {
+        "indexes": [
+            {"name": "domain_index", "key": [("domain_id", ASCENDING)]},
+            # One copy of a question text per domain; questions stored before
+            # text_hash existed are left out until backfilled
+            {"name": "domain_text_hash_index", "key": [("domain_id", ASCENDING), ("text_hash", ASCENDING)],
+             "unique": True, "partialFilterExpression": {"text_hash": {"$exists": True}}},
+            {"name": "creator_page_index", "key": [("created_by", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]}
+        ]
+    },
+    # Compound indexes backing keyset pagination (created_at, _id newest first)
+    "responses": {
+        "indexes": [
+            {"name": "question_page_index", "key": [("question_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]},
+            {"name": "user_page_index", "key": [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]},
+            {"name": "page_index", "key": [("created_at", DESCENDING), ("_id", DESCENDING)]},
+            {"name": "photo_index", "key": [("photo_ref.photo_id", ASCENDING)], "partialFilterExpression": {"photo_ref.photo_id": {"$exists": True}}}
+        ]
+    },
+    "evaluations": {
+        "indexes": [
+            {"name": "response_index", "key": [("response_id", ASCENDING), ("created_at", DESCENDING)]}
+        ]
+    },
+    "evaluation_cache": {
+        "indexes": [
+            {"name": "eval_cache_ttl", "key": [("expires_at", ASCENDING)], "expireAfterSeconds": 0},
+            {"name": "eval_cache_created_at", "key": [("created_at", ASCENDING)]}
+        ]
+    },
+    "evaluation_jobs": {
+        "indexes": [
+            {"name": "job_claim_index", "key": [("status", ASCENDING), ("available_at", ASCENDING)]},
+            {"name": "job_lease_index", "key": [("status", ASCENDING), ("lease_expires_at", ASCENDING)]},
+            {"name": "job_response_index", "key": [("response_id", ASCENDING)]}
+        ]
+    },
+    "admin_posts": {
+        "indexes": [
+            {"name": "page_index", "key": [("created_at", DESCENDING), ("_id", DESCENDING)]}
+        ]
+    },
+    "announcement_jobs": {
+        "indexes": [
+            {"name": "post_index", "key": [("post_id", ASCENDING), ("created_at", DESCENDING)]},
+            {"name": "job_status_index", "key": [("status", ASCENDING), ("lease_expires_at", ASCENDING)]}
+        ]
+    },
+    # Keyed by domain id, so _id is the only index needed
+    "interview_bundles": {
+        "indexes": []
+    },
+    "invalidations": {
+        "indexes": [
+            # Events only matter to workers catching up; older ones can go
+            {"name": "invalidation_ttl", "key": [("created_at", ASCENDING)], "expireAfterSeconds": 3600}
+        ]
+    },
+    "pdf_imports": {
+        "indexes": [
+            {"name": "creator_index", "key": [("created_by", ASCENDING), ("created_at", DESCENDING)]},
+            {"name": "status_index", "key": [("status", ASCENDING), ("updated_at", ASCENDING)]}
+        ]
+    },
+    "interview_analyses": {
+        "indexes": [
+            {"name": "user_index", "key": [("user_id", ASCENDING), ("analyzed_at", DESCENDING)]}
+        ]
     }
+}
 
-    for col_name, config in collections_config.items():
-        try:
-            # Create collection if it doesn't exist
-            if col_name not in db.list_collection_names():
-                db.create_collection(col_name, validator=config.get("validator"))
+def collections_version():
+    """Digest of COLLECTIONS; changes whenever create_collections() has new work"""
+    spec = json.dumps(COLLECTIONS, default=str, sort_keys=True)
+    return hashlib.sha256(spec.encode("utf-8")).hexdigest()
+
+def index_matches(index_def, existing):
+    """True when an index from index_information() has the same key and options"""
+    if [tuple(k) for k in existing["key"]] != [tuple(k) for k in index_def["key"]]:
+        return False
+    return all(existing.get(option) == index_def.get(option) for option in INDEX_OPTIONS)
+
+async def create_collections():
+    """Create missing collections and indexes. Raises once everything has been
+    attempted if anything failed, so a bootstrap lock is not kept on a partial run."""
+    existing_collections = await db.list_collection_names()
+    failures = []
+
+    for col_name, config in COLLECTIONS.items():
+        # Create collection if it doesn't exist
+        if col_name not in existing_collections:
+            options = {"validator": config["validator"]} if "validator" in config else {}
+            try:
+                await db.create_collection(col_name, **options)
                 print(f"✅ Created collection: {col_name}")
+            except CollectionInvalid:
+                # Created concurrently by another process
+                pass
+            except Exception as e:
+                # Indexes are still built below; inserting creates the collection anyway
+                print(f"❌ Error creating collection {col_name}: {e}")
+                failures.append(col_name)
 
+        try:
             collection = db[col_name]
+            existing_indexes = await collection.index_information()
             
-            # Get existing indexes
-            existing_indexes = collection.index_information()
-            
-            # Create or update indexes
             for index_def in config["indexes"]:
                 index_name = index_def["name"]
                 try:
-                    # Drop existing index if it exists
-                    if index_name in existing_indexes:
-                        collection.drop_index(index_name)
-                        print(f"♻️ Dropped existing index: {index_name}")
+                    # Already satisfied, possibly under another name
+                    if any(index_matches(index_def, existing) for existing in existing_indexes.values()):
+                        continue
+                    
+                    # Drop only indexes that clash by name or key but differ in options
+                    for name, existing in existing_indexes.items():
+                        same_key = [tuple(k) for k in existing["key"]] == [tuple(k) for k in index_def["key"]]
+                        if name != "_id_" and (name == index_name or same_key):
+                            await collection.drop_index(name)
+                            print(f"♻️ Dropped outdated index: {name}")
                     
-                    # Create new index
-                    collection.create_index(
-                        index_def["key"],
-                        name=index_name,
-                        unique=index_def.get("unique", False),
-                        partialFilterExpression=index_def.get("partialFilterExpression", None)
-                    )
-                    print(f"✅ Created index: {index_name}")
+                    options = {option: index_def[option] for option in INDEX_OPTIONS if option in index_def}
+                    await collection.create_index(index_def["key"], name=index_name, background=True, **options)
+                    print(f"✅ Created index: {col_name}.{index_name}")
                 except Exception as index_error:
                     print(f"⚠️ Failed to create index {index_name}: {index_error}")
+                    failures.append(f"{col_name}.{index_name}")
                     
         except Exception as e:
-            print(f"❌ Error setting up {col_name}: {e}")
+            print(f"❌ Error setting up indexes for {col_name}: {e}")
+            failures.append(col_name)
 
+    if failures:
+        raise RuntimeError(f"Collection setup incomplete: {', '.join(failures)}")
     print("✅ All collections and indexes initialized")
                
-def get_user_by_email(email):
-    return users.find_one({"email": email})
+async def list_users(query, mode="summary", fields=None, limit=None, cursor=None):
+    projection = listing_projection(USER_PROJECTIONS, mode, fields)
+    users_list = await find_page(users, query, projection, limit, cursor)
+    for user in users_list:
+        user["id"] = str(user["_id"])
+        del user["_id"]
+        # Defaults only for fields that were asked for; others stay absent
+        if projected(projection, "verified"):
+            user["verified"] = user.get("verified", False)
+    return users_list
 
-def grant_admin_access(email, processed_by=None):
+async def get_user_by_email(email):
+    return await users.find_one({"email": email})
+
+async def grant_admin_access(email, processed_by=None):
     try:
         # Find the admin request
-        request = admin_requests.find_one({
+        request = await admin_requests.find_one({
             "email": email,
             "status": "pending"
         })
@@ -163,11 +474,11 @@ def grant_admin_access(email, processed_by=None):
             return False
 
         # Check if user exists
-        user = users.find_one({"email": email})
+        user = await users.find_one({"email": email})
         
         if user:
             # Update existing user to admin
-            result = users.update_one(
+            result = await users.update_one(
                 {"email": email},
                 {
                     "$set": {
@@ -178,21 +489,21 @@ def grant_admin_access(email, processed_by=None):
                 }
             )
         else:
-            # If user doesn't exist, create them as admin with the password from the request
-            # Note: You'll need to modify request_admin_access to store the hashed password
-            create_user(
+            # If user doesn't exist, create them as admin with the password hash from the request
+            await create_user(
                 username=email.split('@')[0],
                 email=email,
-                password=request.get('password_hash', str(ObjectId())),  # Use stored password or random
-                role="admin"
+                password=str(ObjectId()),  # Random password if the request has no hash
+                role="admin",
+                password_hash=request.get('password_hash')
             )
-            users.update_one(
+            await users.update_one(
                 {"email": email},
                 {"$set": {"verified": True}}
             )
 
         # Update the admin request status
-        admin_requests.update_one(
+        await admin_requests.update_one(
             {"_id": request["_id"]},
             {
                 "$set": {
@@ -204,6 +515,8 @@ def grant_admin_access(email, processed_by=None):
         )
         
         return True
+    except HashPoolBusy:
+        raise
     except Exception as e:
         print(f"Error granting admin access: {e}")
         return False
@@ -213,76 +526,79 @@ def grant_admin_access(email, processed_by=None):
 def generate_otp(length=6):
     return ''.join(random.choices(string.digits, k=length))
 
-def create_otp(email, expires_minutes=5):
+async def create_otp(email, expires_minutes=5):
     otp = generate_otp()
     expires_at = datetime.utcnow() + timedelta(minutes=expires_minutes)
-    otps.update_one(
+    await otps.update_one(
         {"email": email},
         {"$set": {"otp": otp, "expires_at": expires_at, "verified": False}},
         upsert=True
     )
     return otp
 
-def verify_otp(email, otp):
-    record = otps.find_one({"email": email})
+async def verify_otp(email, otp):
+    record = await otps.find_one({"email": email})
     if not record or datetime.utcnow() > record["expires_at"]:
         return False
     if record["otp"] == otp and not record["verified"]:
-        otps.update_one({"email": email}, {"$set": {"verified": True}})
+        await otps.update_one({"email": email}, {"$set": {"verified": True}})
         return True
     return False
 
 # Admin Management
-def create_default_admin():
-    if not users.find_one({"email": DEFAULT_ADMIN_EMAIL}):
-        create_user(
+async def create_default_admin():
+    if not await users.find_one({"email": DEFAULT_ADMIN_EMAIL}):
+        await create_user(
             username="admin",
             email=DEFAULT_ADMIN_EMAIL,
             password=DEFAULT_ADMIN_PASSWORD,
             role="admin"
         )
-        users.update_one(
+        await users.update_one(
             {"email": DEFAULT_ADMIN_EMAIL},
             {"$set": {"is_default_admin": True, "verified": True}}
         )
 
 
 
-def request_admin_access(email, message, full_name, phone, password):
+async def request_admin_access(email, message, full_name, phone, password):
     try:
+        # Hash once and reuse it for both the user and the request
+        password_hash = await get_password_hash(password)
+
         # First create or update the user account
-        user = users.find_one({"email": email})
+        user = await users.find_one({"email": email})
         
         if not user:
             # Create new user with admin_request_pending flag
             user_data = {
                 "username": email.split('@')[0],
                 "email": email,
-                "password_hash": get_password_hash(password),  # Store hashed password
+                "password_hash": password_hash,  # Store hashed password
                 "role": "user",
                 "admin_request_pending": True,
                 "created_at": datetime.utcnow()
             }
-            users.insert_one(user_data)
+            await users.insert_one(user_data)
         else:
             # Update existing user
-            users.update_one(
+            await users.update_one(
                 {"email": email},
                 {
                     "$set": {
                         "admin_request_pending": True,
-                        "password_hash": get_password_hash(password)  # Update password if needed
+                        "password_hash": password_hash  # Update password if needed
                     }
                 }
             )
         
         # Create the admin request (store hashed password for reference)
-        result = admin_requests.insert_one({
+        result = await admin_requests.insert_one({
             "email": email,
             "message": message,
             "full_name": full_name,
             "phone": phone,
-            "password_hash": get_password_hash(password),  # Store hashed password
+            "password_hash": password_hash,  # Store hashed password
             "status": "pending",
             "requested_at": datetime.utcnow(),
             "processed_at": None,
@@ -290,13 +606,15 @@ def request_admin_access(email, message, full_name, phone, password):
         })
         
         return result.inserted_id is not None
+    except HashPoolBusy:
+        raise
     except Exception as e:
         print(f"Error creating admin request: {e}")
         return False                
-def get_pending_admin_requests():
+async def get_pending_admin_requests():
     try:
         # Only get requests with "pending" status
-        requests = list(admin_requests.find({"status": "pending"}))
+        requests = await admin_requests.find({"status": "pending"}).to_list(length=None)
         print(f"Found {len(requests)} pending requests in database")
         for req in requests:
             req["id"] = str(req["_id"])
@@ -308,18 +626,19 @@ def get_pending_admin_requests():
 
 # In database.py:
 # Add these collections
-domains = db.domains
-questions = db.questions
-responses = db.responses
+domains = collection("domains")
+questions = collection("questions")
+responses = collection("responses")
 
-def create_domain(name, admin_email=None):
+async def create_domain(name, admin_email=None):
     try:
         domain = {
             "name": name,
             "created_at": datetime.utcnow(),
             "created_by": admin_email
         }
-        result = domains.insert_one(domain)
+        result = await domains.insert_one(domain)
+        catalog.invalidate_domains()
         domain['_id'] = result.inserted_id
         domain['id'] = str(result.inserted_id)
         return domain  # Return the full domain object
@@ -327,27 +646,132 @@ def create_domain(name, admin_email=None):
         print(f"Error creating domain: {e}")
         return None
     
-def add_question(domain_id, text, admin_email=None, time_limit=60):  # Add time_limit parameter
+async def get_domain(name):
+    return await domains.find_one({"name": name})
+
+async def get_domain_by_id(domain_id):
+    try:
+        return await domains.find_one({"_id": ObjectId(domain_id)})
+    except Exception:
+        print(f"Invalid domain ID format: {domain_id}")
+        return None
+
+async def get_question_by_id(question_id):
+    try:
+        return await questions.find_one({"_id": ObjectId(question_id)})
+    except Exception:
+        print(f"Invalid question ID format: {question_id}")
+        return None
+    
+def question_text_hash(text):
+    """Hash of a question's text ignoring case and whitespace, for per-domain dedupe"""
+    normalized = " ".join(text.split()).lower()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+async def add_question(domain_id, text, admin_email=None, time_limit=60):  # Add time_limit parameter
     try:
         question = {
             "domain_id": domain_id,
             "text": text,
+            "text_hash": question_text_hash(text),
             "time_limit": time_limit,  # Add this field
             "created_at": datetime.utcnow(),
             "created_by": admin_email
         }
-        return questions.insert_one(question).inserted_id
+        result = await questions.insert_one(question)
+        await questions_changed(domain_id)
+        return result.inserted_id
+    except DuplicateKeyError:
+        # Same question already in this domain: hand back the existing one
+        existing = await questions.find_one(
+            {"domain_id": domain_id, "text_hash": question["text_hash"]}, {"_id": 1}
+        )
+        return existing["_id"] if existing else None
     except Exception as e:
         print(f"Error adding question: {e}")
         return None
 
-def get_all_domains(admin_email=None):
+async def bulk_add_questions(items, admin_email=None, chunk_size=1000):
+    """Insert many questions at once, skipping texts already present in their domain.
+    items are dicts with domain_id, text and time_limit. Returns one result per
+    item, in order: {"index", "status": created|duplicate|failed, "id", "error"}."""
+    results = [{"index": i, "status": None, "id": None, "error": None} for i in range(len(items))]
+
+    # Domains are checked with one query for the whole batch
+    domain_ids = set()
+    for item in items:
+        if ObjectId.is_valid(item["domain_id"]):
+            domain_ids.add(ObjectId(item["domain_id"]))
+    known_domains = {str(d["_id"]) async for d in domains.find({"_id": {"$in": list(domain_ids)}}, {"_id": 1})}
+
+    hashes = [question_text_hash(item["text"]) for item in items]
+    existing = {}
+    async for q in questions.find(
+        {"domain_id": {"$in": list(known_domains)}, "text_hash": {"$in": list(set(hashes))}},
+        {"domain_id": 1, "text_hash": 1}
+    ):
+        existing[(q["domain_id"], q["text_hash"])] = str(q["_id"])
+
+    now = datetime.utcnow()
+    pending = []
+    for i, item in enumerate(items):
+        key = (item["domain_id"], hashes[i])
+        if item["domain_id"] not in known_domains:
+            results[i].update(status="failed", error="Domain not found")
+        elif key in existing:
+            results[i].update(status="duplicate", id=existing[key])
+        else:
+            # Pre-assigned ids let us report ids even when part of a chunk fails,
+            # and make later copies of the same text in this batch duplicates
+            question_id = ObjectId()
+            existing[key] = str(question_id)
+            results[i].update(status="created", id=str(question_id))
+            pending.append((i, {
+                "_id": question_id,
+                "domain_id": item["domain_id"],
+                "text": item["text"],
+                "text_hash": hashes[i],
+                "time_limit": item["time_limit"],
+                "created_at": now,
+                "created_by": admin_email
+            }))
+
+    for start in range(0, len(pending), chunk_size):
+        chunk = pending[start:start + chunk_size]
+        try:
+            await questions.insert_many([doc for _, doc in chunk], ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                i = chunk[error["index"]][0]
+                if error.get("code") == 11000:
+                    # Inserted concurrently by someone else since we looked
+                    results[i].update(status="duplicate", id=None)
+                else:
+                    results[i].update(status="failed", id=None, error=error.get("errmsg"))
+        except Exception as e:
+            print(f"Error inserting question chunk: {e}")
+            for i, _ in chunk:
+                results[i].update(status="failed", id=None, error=str(e))
+    for domain_id in {doc["domain_id"] for _, doc in pending}:
+        await questions_changed(domain_id)
+    return results
+
+async def backfill_question_hashes():
+    """Give questions stored before text_hash existed a hash so dedupe covers them"""
+    async for q in questions.find({"text_hash": {"$exists": False}}, {"text": 1}):
+        try:
+            await questions.update_one({"_id": q["_id"]}, {"$set": {"text_hash": question_text_hash(q.get("text") or "")}})
+        except DuplicateKeyError:
+            # A legacy duplicate; leave it unhashed rather than deleting anything
+            pass
+
+async def get_all_domains(admin_email=None):
     try:
         query = {}
         if admin_email:
             query["created_by"] = admin_email
             
-        domains_list = list(domains.find(query))
+        domains_list = await domains.find(query).to_list(length=None)
         
         formatted_domains = []
         for domain in domains_list:
@@ -371,32 +795,35 @@ def get_all_domains(admin_email=None):
         raise
     
     
-def get_all_questions(admin_email=None):
+async def get_all_questions(admin_email=None, mode="summary", fields=None, limit=None, cursor=None):
     try:
         query = {}
         if admin_email:
             query["created_by"] = admin_email
             
-        questions_list = list(questions.find(query))
+        projection = listing_projection(QUESTION_PROJECTIONS, mode, fields)
+        questions_list = await find_page(questions, query, projection, limit, cursor)
         for question in questions_list:
             question["id"] = str(question["_id"])
             del question["_id"]
-            question["domain_id"] = str(question["domain_id"])
-            # Ensure time_limit exists, default to 60 if not
-            question["time_limit"] = question.get("time_limit", 60)
+            if "domain_id" in question:
+                question["domain_id"] = str(question["domain_id"])
+            # Ensure time_limit exists, default to 60 if not (when it was asked for)
+            if projected(projection, "time_limit"):
+                question["time_limit"] = question.get("time_limit", 60)
         return questions_list
     except Exception as e:
         print(f"Error retrieving questions: {e}")
         return []
 
-def get_questions_by_domain(domain_id):
+async def get_questions_by_domain(domain_id):
     try:
         # Convert string ID to ObjectId if necessary
         from bson import ObjectId
         try:
             q_id = ObjectId(domain_id) if isinstance(domain_id, str) else domain_id
             # Check if domain exists
-            domain = domains.find_one({"_id": q_id})
+            domain = await domains.find_one({"_id": q_id})
             if not domain:
                 print(f"Domain with ID {domain_id} not found")
                 return None
@@ -405,7 +832,7 @@ def get_questions_by_domain(domain_id):
             return None
             
         # Use string ID for query since we're storing as string
-        domain_questions = list(questions.find({"domain_id": str(domain_id)}))
+        domain_questions = await questions.find({"domain_id": str(domain_id)}).to_list(length=None)
         print(f"Found {len(domain_questions)} questions for domain {domain_id}")  # Add logging
         
         for question in domain_questions:
@@ -419,17 +846,79 @@ def get_questions_by_domain(domain_id):
         print(f"Error retrieving questions by domain: {e}")
         return None
 
-def delete_domain(domain_id):
+# Interview bundles: each domain's question list, serialized once and stored as
+# ready-to-send JSON bytes. Every question write bumps the bundle's version; a
+# bundle whose built_version lags behind is rebuilt on its next read.
+async def questions_changed(domain_id):
+    """Mark the domain's bundle stale and drop cached question lists in every worker"""
+    # No upsert: a domain without a bundle row gets one (at version 0) on its
+    # first read, and an unknown domain_id must not get one at all
+    await interview_bundles.update_one({"_id": str(domain_id)}, {"$inc": {"version": 1}})
+    catalog.invalidate_questions(domain_id)
+
+async def build_interview_bundle(domain_id, version):
+    domain_questions = questions.find(
+        {"domain_id": domain_id},
+        {"domain_id": 1, "text": 1, "time_limit": 1, "created_at": 1}
+    )
+    items = []
+    async for question in domain_questions:
+        created_at = question.get("created_at")
+        items.append({
+            "id": str(question["_id"]),
+            "domain_id": str(question["domain_id"]),
+            "text": question["text"],
+            "time_limit": question.get("time_limit", 60),
+            "created_at": created_at.isoformat() if created_at else None
+        })
+    body = json.dumps(items, separators=(",", ":")).encode("utf-8")
+    bundle = {
+        "body": body,
+        "etag": '"' + hashlib.sha256(body).hexdigest()[:32] + '"',
+        "version": version,
+        "built_version": version,
+        "built_at": datetime.utcnow()
+    }
+    # Only store it if no question changed while we were reading; otherwise the
+    # next reader rebuilds
+    await interview_bundles.update_one(
+        {"_id": domain_id, "version": version},
+        {"$set": bundle}
+    )
+    return bundle
+
+async def get_interview_bundle(domain_id):
+    """The domain's current bundle ({"body", "etag", "version", ...}), rebuilding it
+    if stale, or None if the domain does not exist"""
+    # Checked even for a fresh bundle: rows left behind by the old upserting
+    # questions_changed() may belong to domains that never existed
+    if not await get_domain_by_id(domain_id):
+        return None
+    bundle = await interview_bundles.find_one({"_id": domain_id})
+    if bundle and "built_version" in bundle and bundle["built_version"] == bundle["version"]:
+        return bundle
+    if not bundle:
+        try:
+            await interview_bundles.insert_one({"_id": domain_id, "version": 0})
+        except DuplicateKeyError:
+            pass
+        bundle = await interview_bundles.find_one({"_id": domain_id})
+    return await build_interview_bundle(domain_id, bundle["version"])
+
+async def delete_domain(domain_id):
     try:
         # domain_id should already be ObjectId at this point
         # Delete the domain
-        result = domains.delete_one({"_id": domain_id})
+        result = await domains.delete_one({"_id": domain_id})
         if result.deleted_count == 0:
             return False
             
         # Delete all questions associated with this domain
         # Note we're using the string representation here
-        questions.delete_many({"domain_id": str(domain_id)})
+        await questions.delete_many({"domain_id": str(domain_id)})
+        await interview_bundles.delete_one({"_id": str(domain_id)})
+        catalog.invalidate_domains()
+        catalog.invalidate_questions(domain_id)
         
         return True
     except Exception as e:
@@ -437,7 +926,7 @@ def delete_domain(domain_id):
         return False
     
     
-def delete_question(question_id):
+async def delete_question(question_id):
     try:
         # Convert string ID to ObjectId if necessary
         if isinstance(question_id, str):
@@ -449,73 +938,287 @@ def delete_question(question_id):
                 return False
                 
         # Delete the question
-        result = questions.delete_one({"_id": question_id})
-        if result.deleted_count == 0:
+        question = await questions.find_one_and_delete({"_id": question_id}, {"domain_id": 1})
+        if not question:
             return False
+        await questions_changed(question["domain_id"])
             
         # Delete all responses associated with this question
-        responses.delete_many({"question_id": question_id})
+        await responses.delete_many({"question_id": question_id})
         
         return True
     except Exception as e:
         print(f"Error deleting question: {e}")
         return False
 
-def add_user_response(question_id, user_id, user_response, test_log=None, photo=None):
+# Response photos live in GridFS, content-addressed by the SHA-256 of the image
+# bytes, so identical photos are stored once and response documents stay small.
+def get_photos():
+    global _photos
+    if _photos is None:
+        _photos = AsyncIOMotorGridFSBucket(get_db(), bucket_name="photos")
+    return _photos
+
+photos = LazyHandle(get_photos)
+
+def decode_photo(photo):
+    """Split a base64 photo (optionally a data: URL) into (content_type, bytes)"""
+    content_type = "image/jpeg"
+    if photo.startswith("data:"):
+        header, photo = photo.split(",", 1)
+        content_type = header[5:].split(";")[0] or content_type
+    return content_type, base64.b64decode(photo)
+
+# Already-compressed formats never shrink enough under zlib to be worth trying
+COMPRESSED_TYPES = {"image/jpeg", "image/jpg", "image/png", "image/webp", "image/gif"}
+
+def prepare_photo(photo):
+    """Decode, hash and (if it pays off) compress a photo. CPU bound on multi-MB
+    images, so save_photo runs it in a thread. Returns (ref, stored bytes, encoding)."""
+    content_type, data = decode_photo(photo)
+    ref = {"photo_id": hashlib.sha256(data).hexdigest(), "content_type": content_type, "size": len(data)}
+    if content_type not in COMPRESSED_TYPES:
+        compressed = zlib.compress(data, 6)
+        if len(compressed) < len(data) * 0.9:
+            return ref, compressed, "zlib"
+    return ref, data, "identity"
+
+async def save_photo(photo):
+    """Store a base64 photo and return the reference kept on the response document"""
+    ref, payload, encoding = await asyncio.to_thread(prepare_photo, photo)
+    photo_id = ref["photo_id"]
+    
+    if await db.photos.files.find_one({"filename": photo_id}, {"_id": 1}):
+        return ref
+    
+    await photos.upload_from_stream(
+        photo_id,
+        payload,
+        metadata={"content_type": ref["content_type"], "encoding": encoding, "size": ref["size"]}
+    )
+    return ref
+
+async def load_photo(photo_id):
+    """Returns (content_type, bytes) for a stored photo, or None"""
+    try:
+        stream = await photos.open_download_stream_by_name(photo_id)
+    except Exception:
+        return None
+    data = await stream.read()
+    metadata = stream.metadata or {}
+    if metadata.get("encoding") == "zlib":
+        data = await asyncio.to_thread(zlib.decompress, data)
+    return metadata.get("content_type", "image/jpeg"), data
+
+def attach_thumbnail(response):
+    """Expose the inline photo thumbnail (if generated) as a top-level field"""
+    response["thumbnail"] = (response.get("photo_ref") or {}).get("thumbnail")
+    return response
+
+async def add_user_response(question_id, user_id, user_response, test_log=None, photo=None):
     try:
         response = {
             "question_id": str(question_id),
             "user_id": user_id,
             "user_response": user_response,
             "test_log": test_log or [],
-            "photo": photo,
+            "photo_ref": await save_photo(photo) if photo else None,
             "created_at": datetime.utcnow()
         }
-        result = responses.insert_one(response)
+        result = await responses.insert_one(response)
         return str(result.inserted_id)
     except Exception as e:
         print(f"Error adding response: {e}")
         return None
 
-def get_all_responses(admin_email=None):
+async def save_user_response(user_id, question_id, user_response):
+    return await add_user_response(question_id, user_id, user_response)
+
+async def get_all_responses(admin_email=None, mode="summary", fields=None, limit=None, cursor=None):
     try:
         query = {}
         if admin_email:
             # Get all questions created by this admin
             admin_questions = questions.find({"created_by": admin_email}, {"_id": 1})
-            question_ids = [str(q["_id"]) for q in admin_questions]
+            question_ids = [str(q["_id"]) async for q in admin_questions]
             query["question_id"] = {"$in": question_ids}
             
-        responses_list = list(responses.find(query))
+        projection = listing_projection(RESPONSE_PROJECTIONS, mode, fields)
+        responses_list = await find_page(responses, query, projection, limit, cursor)
         for response in responses_list:
             response["id"] = str(response["_id"])
             del response["_id"]
+            if projected(projection, "photo_ref"):
+                attach_thumbnail(response)
         return responses_list
     except Exception as e:
         print(f"Error retrieving responses: {e}")
         return []
 
-def get_responses_by_question(question_id):
+async def get_admin_responses_joined(admin_email, limit=None, cursor=None,
+                                     with_question=True, with_evaluation=True):
+    """Responses to an admin's questions, newest first, joined in one aggregation
+    with the question text and the latest evaluation score"""
+    try:
+        admin_questions = questions.find({"created_by": admin_email}, {"_id": 1})
+        question_ids = [str(q["_id"]) async for q in admin_questions]
+        
+        pipeline = [
+            {"$match": after_cursor({"question_id": {"$in": question_ids}}, cursor)},
+            {"$sort": {"created_at": -1, "_id": -1}}
+        ]
+        if limit is not None:
+            pipeline.append({"$limit": limit + 1})
+        pipeline.append({"$project": RESPONSE_PROJECTIONS["summary"]})
+        # Joins run after $limit, so they only touch one page of responses
+        if with_question:
+            pipeline += [
+                {"$lookup": {
+                    "from": "questions",
+                    "let": {"qid": {"$convert": {"input": "$question_id", "to": "objectId", "onError": None}}},
+                    "pipeline": [
+                        {"$match": {"$expr": {"$eq": ["$_id", "$$qid"]}}},
+                        {"$project": {"_id": 0, "text": 1}}
+                    ],
+                    "as": "question"
+                }},
+                {"$set": {"question_text": {"$arrayElemAt": ["$question.text", 0]}}},
+                {"$unset": "question"}
+            ]
+        if with_evaluation:
+            pipeline += [
+                {"$lookup": {
+                    "from": "evaluations",
+                    "let": {"rid": {"$toString": "$_id"}},
+                    "pipeline": [
+                        {"$match": {"$expr": {"$eq": ["$response_id", "$$rid"]}}},
+                        {"$sort": {"created_at": -1}},
+                        {"$limit": 1},
+                        {"$project": {"_id": 0, "score": "$evaluation.score"}}
+                    ],
+                    "as": "evaluation"
+                }},
+                {"$set": {"evaluation_score": {"$arrayElemAt": ["$evaluation.score", 0]}}},
+                {"$unset": "evaluation"}
+            ]
+        
+        responses_list = await responses.aggregate(pipeline).to_list(length=None)
+        for response in responses_list:
+            response["id"] = str(response["_id"])
+            del response["_id"]
+            attach_thumbnail(response)
+        return responses_list
+    except Exception as e:
+        print(f"Error retrieving joined responses: {e}")
+        return []
+
+async def iter_response_export(domain_id=None, admin_email=None, since=None, until=None,
+                               batch_size=1000):
+    """Yield every matching response, oldest first, joined with its question, its
+    latest evaluation and the interview analysis that followed it. Rows stream
+    from a server-side cursor, so memory stays flat however many there are."""
+    question_query = {}
+    if domain_id:
+        question_query["domain_id"] = domain_id
+    if admin_email:
+        question_query["created_by"] = admin_email
+    # Question metadata is bounded by the catalog size, not the number of responses
+    question_map = {}
+    async for q in questions.find(question_query, {"text": 1, "domain_id": 1}):
+        question_map[str(q["_id"])] = q
+
+    match = {}
+    if question_query:
+        match["question_id"] = {"$in": list(question_map)}
+    if since or until:
+        match["created_at"] = {}
+        if since:
+            match["created_at"]["$gte"] = since
+        if until:
+            match["created_at"]["$lt"] = until
+
+    pipeline = [
+        {"$match": match},
+        {"$sort": {"created_at": 1, "_id": 1}},
+        {"$project": {"user_id": 1, "question_id": 1, "user_response": 1, "created_at": 1}},
+        {"$lookup": {
+            "from": "evaluations",
+            "let": {"rid": {"$toString": "$_id"}},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$response_id", "$$rid"]}}},
+                {"$sort": {"created_at": -1}},
+                {"$limit": 1},
+                {"$project": {"_id": 0, "score": "$evaluation.score", "feedback": "$evaluation.feedback"}}
+            ],
+            "as": "evaluation"
+        }},
+        # Analyses are stored per user; the one for this response is the first
+        # analysis the user ran after answering it
+        {"$lookup": {
+            "from": "interview_analyses",
+            "let": {"uid": "$user_id", "answered_at": "$created_at"},
+            "pipeline": [
+                {"$match": {"$expr": {"$and": [
+                    {"$eq": ["$user_id", "$$uid"]},
+                    {"$gte": ["$analyzed_at", "$$answered_at"]}
+                ]}}},
+                {"$sort": {"analyzed_at": 1}},
+                {"$limit": 1},
+                {"$project": {"_id": 0, "score": "$analysis.overallScore",
+                              "feedback": "$analysis.overallFeedback"}}
+            ],
+            "as": "analysis"
+        }}
+    ]
+
+    cursor = responses.aggregate(pipeline, allowDiskUse=True, batchSize=batch_size)
+    async for doc in cursor:
+        question = question_map.get(doc.get("question_id")) or {}
+        evaluation = doc["evaluation"][0] if doc["evaluation"] else {}
+        analysis = doc["analysis"][0] if doc["analysis"] else {}
+        yield {
+            "id": str(doc["_id"]),
+            "user_id": doc.get("user_id"),
+            "question_id": doc.get("question_id"),
+            "domain_id": question.get("domain_id"),
+            "question_text": question.get("text"),
+            "user_response": doc.get("user_response"),
+            "created_at": doc.get("created_at"),
+            "evaluation_score": evaluation.get("score"),
+            "evaluation_feedback": evaluation.get("feedback"),
+            "analysis_score": analysis.get("score"),
+            "analysis_feedback": analysis.get("feedback")
+        }
+
+async def get_responses_by_question(question_id, mode="summary", fields=None):
     try:
         # Use string ID directly since we're storing as string
-        question_responses = list(responses.find({"question_id": str(question_id)}))
+        projection = listing_projection(RESPONSE_PROJECTIONS, mode, fields)
+        question_responses = await responses.find({"question_id": str(question_id)}, projection).to_list(length=None)
         for response in question_responses:
             response["id"] = str(response["_id"])
             del response["_id"]
-            # Ensure all required fields are present
-            response.setdefault("user_response", "")
-            response.setdefault("created_at", datetime.utcnow())
+            # Ensure requested fields are present
+            if projected(projection, "user_response"):
+                response.setdefault("user_response", "")
+            if projected(projection, "created_at"):
+                response.setdefault("created_at", datetime.utcnow())
+            if projected(projection, "photo_ref"):
+                attach_thumbnail(response)
         return question_responses
     except Exception as e:
         print(f"Error retrieving responses by question: {e}")
         return []
 
-def get_responses_by_user(user_id):
+async def get_responses_by_user(user_id, mode="summary", fields=None, limit=None, cursor=None):
     try:
-        user_responses = list(responses.find({"user_id": user_id}))
+        projection = listing_projection(RESPONSE_PROJECTIONS, mode, fields)
+        user_responses = await find_page(responses, {"user_id": user_id}, projection, limit, cursor)
         for response in user_responses:
             response["id"] = str(response["_id"])
             del response["_id"]
+            if projected(projection, "photo_ref"):
+                attach_thumbnail(response)
         return user_responses
     except Exception as e:
         print(f"Error retrieving responses by user: {e}")
@@ -523,18 +1226,22 @@ def get_responses_by_user(user_id):
     
     
 # Add this collection with others
-admin_posts = db.admin_posts
+admin_posts = collection("admin_posts")
 
-def create_admin_post(post_data):
+async def create_admin_post(post_data):
     try:
-        return admin_posts.insert_one(post_data).inserted_id
+        result = await admin_posts.insert_one(post_data)
+        return result.inserted_id
     except Exception as e:
         print(f"Error creating admin post: {e}")
         return None
 
-def get_all_admin_posts():
+async def get_all_admin_posts(limit=None, cursor=None):
     try:
-        posts = list(admin_posts.find().sort("created_at", -1))
+        if limit is None:
+            posts = await admin_posts.find().sort("created_at", -1).to_list(length=None)
+        else:
+            posts = await find_page(admin_posts, {}, None, limit, cursor)
         for post in posts:
             post["id"] = str(post["_id"])
             del post["_id"]
@@ -543,10 +1250,28 @@ def get_all_admin_posts():
         print(f"Error getting admin posts: {e}")
         return []
     
-import PyPDF2
-from io import BytesIO
+def split_page_questions(text):
+    """Split one page of extracted text into questions at Q:/Question/Q. markers"""
+    questions = []
+    current_question = []
+    for line in text.split('\n'):
+        line = line.strip()
+        if line:
+            if line.startswith(('Q:', 'Question', 'Q.', 'Q ')) and current_question:
+                questions.append(' '.join(current_question))
+                current_question = [line]
+            else:
+                current_question.append(line)
+    
+    if current_question:
+        questions.append(' '.join(current_question))
+    return questions
 
 def extract_questions_from_pdf(pdf_file):
+    # PyPDF2 is only needed here, so keep it out of the import path of every worker
+    import PyPDF2
+    from io import BytesIO
+
     try:
         questions = []
         pdf_reader = PyPDF2.PdfReader(BytesIO(pdf_file.read()))
@@ -554,30 +1279,16 @@ def extract_questions_from_pdf(pdf_file):
         for page in pdf_reader.pages:
             text = page.extract_text()
             if text:
-                # Split by question markers (adjust as needed)
-                lines = text.split('\n')
-                current_question = []
-                
-                for line in lines:
-                    line = line.strip()
-                    if line:
-                        if line.startswith(('Q:', 'Question', 'Q.', 'Q ')) and current_question:
-                            questions.append(' '.join(current_question))
-                            current_question = [line]
-                        else:
-                            current_question.append(line)
-                
-                if current_question:
-                    questions.append(' '.join(current_question))
+                questions.extend(split_page_questions(text))
                     
         return questions
     except Exception as e:
         print(f"Error extracting questions from PDF: {e}")
         return []
     
-def save_interview_analysis(user_id, interview_data, analysis):
+async def save_interview_analysis(user_id, interview_data, analysis):
     try:
-        result = db.interview_analyses.insert_one({
+        result = await db.interview_analyses.insert_one({
             "user_id": user_id,
             "interview_data": interview_data,
             "analysis": analysis,
@@ -0,0 +1,91 @@
+import hashlib
+import json
+import re
+from datetime import datetime, timedelta
+from pymongo import ASCENDING
+import database
+from cache import TTLCache
+from config import EVAL_CACHE_MEMORY_SIZE, EVAL_CACHE_MAX_DOCS, EVAL_CACHE_TTL_SECONDS
+
+# Trim the Mongo tier back to EVAL_CACHE_MAX_DOCS every this many writes
+TRIM_EVERY = 100
+
+memory = TTLCache(maxsize=EVAL_CACHE_MEMORY_SIZE, ttl=EVAL_CACHE_TTL_SECONDS)
+counters = {"memory_hits": 0, "mongo_hits": 0, "misses": 0, "writes": 0}
+
+
+def normalize_answer(text):
+    """Case- and whitespace-insensitive form of an answer, used for cache keys"""
+    return re.sub(r"\s+", " ", (text or "")).strip().lower()
+
+
+def make_key(kind, prompt_version, *parts):
+    payload = json.dumps([kind, prompt_version, *parts], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+async def get(key):
+    value = memory.get(key)
+    if value is not None:
+        counters["memory_hits"] += 1
+        return value
+
+    try:
+        doc = await database.evaluation_cache.find_one({"_id": key})
+    except Exception as e:
+        print(f"Error reading evaluation cache: {e}")
+        doc = None
+    # The TTL monitor only runs once a minute, so check expiry here as well
+    if doc and doc["expires_at"] > datetime.utcnow():
+        counters["mongo_hits"] += 1
+        memory.set(key, doc["value"])
+        return doc["value"]
+
+    counters["misses"] += 1
+    return None
+
+
+async def put(key, value):
+    memory.set(key, value)
+    now = datetime.utcnow()
+    try:
+        await database.evaluation_cache.replace_one(
+            {"_id": key},
+            {
+                "_id": key,
+                "value": value,
+                "created_at": now,
+                "expires_at": now + timedelta(seconds=EVAL_CACHE_TTL_SECONDS)
+            },
+            upsert=True
+        )
+        counters["writes"] += 1
+        if counters["writes"] % TRIM_EVERY == 0:
+            await trim()
+    except Exception as e:
+        print(f"Error writing evaluation cache: {e}")
+
+
+async def trim():
+    """Evict the oldest documents once the Mongo tier grows past its size cap"""
+    overflow = await database.evaluation_cache.estimated_document_count() - EVAL_CACHE_MAX_DOCS
+    if overflow <= 0:
+        return
+    oldest = database.evaluation_cache.find({}, {"_id": 1}).sort("created_at", ASCENDING).limit(overflow)
+    ids = [doc["_id"] async for doc in oldest]
+    await database.evaluation_cache.delete_many({"_id": {"$in": ids}})
+
+
+async def get_or_compute(key, compute):
+    """Return the cached value for key, or await compute() and cache it unless it failed"""
+    value = await get(key)
+    if value is not None:
+        return value
+    value = await compute()
+    if isinstance(value, dict) and "error" not in value:
+        await put(key, value)
+    return value
+
+
+def stats():
+    return {**counters, "memory_size": len(memory)}
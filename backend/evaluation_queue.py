@@ -0,0 +1,106 @@
+import uuid
+from datetime import datetime, timedelta
+from pymongo import ASCENDING, ReturnDocument
+import database
+from config import EVAL_JOB_LEASE_SECONDS, EVAL_JOB_MAX_ATTEMPTS
+
+# Job lifecycle: pending -> leased -> done, or back to pending on failure
+# until EVAL_JOB_MAX_ATTEMPTS is reached, after which the job is "dead".
+jobs = database.evaluation_jobs
+
+
+async def enqueue(response_id, evaluation_data):
+    """Queue the response's evaluation; idempotent, so calling it again for the
+    same response never creates a second job"""
+    now = datetime.utcnow()
+    await jobs.update_one(
+        {"response_id": response_id},
+        {"$setOnInsert": {
+            "response_id": response_id,
+            "payload": evaluation_data,
+            "status": "pending",
+            "attempts": 0,
+            "available_at": now,
+            "lease_expires_at": None,
+            "worker_id": None,
+            "lease_id": None,
+            "last_error": None,
+            "created_at": now,
+            "updated_at": now
+        }},
+        upsert=True
+    )
+
+
+async def claim(worker_id):
+    """Lease the oldest runnable job, including jobs whose previous lease expired"""
+    now = datetime.utcnow()
+    return await jobs.find_one_and_update(
+        {
+            "$or": [
+                {"status": "pending", "available_at": {"$lte": now}},
+                {"status": "leased", "lease_expires_at": {"$lte": now}}
+            ]
+        },
+        {
+            "$set": {
+                "status": "leased",
+                "worker_id": worker_id,
+                "lease_id": uuid.uuid4().hex,
+                "lease_expires_at": now + timedelta(seconds=EVAL_JOB_LEASE_SECONDS),
+                "updated_at": now
+            },
+            "$inc": {"attempts": 1}
+        },
+        sort=[("available_at", ASCENDING)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+async def renew(job):
+    """Extend the lease; False once another worker has taken the job over"""
+    result = await jobs.update_one(
+        {"_id": job["_id"], "lease_id": job["lease_id"]},
+        {"$set": {
+            "lease_expires_at": datetime.utcnow() + timedelta(seconds=EVAL_JOB_LEASE_SECONDS),
+            "updated_at": datetime.utcnow()
+        }}
+    )
+    return result.matched_count == 1
+
+
+async def complete(job):
+    await jobs.update_one(
+        {"_id": job["_id"], "lease_id": job["lease_id"]},
+        {"$set": {"status": "done", "lease_expires_at": None, "updated_at": datetime.utcnow()}}
+    )
+
+
+async def fail(job, error, retryable=True):
+    """Retry with exponential backoff, or dead-letter once attempts are used up
+    (or straight away when the error would only happen again)"""
+    now = datetime.utcnow()
+    update = {"last_error": error, "lease_expires_at": None, "updated_at": now}
+    if not retryable or job["attempts"] >= EVAL_JOB_MAX_ATTEMPTS:
+        update["status"] = "dead"
+    else:
+        update["status"] = "pending"
+        update["available_at"] = now + timedelta(seconds=2 ** job["attempts"])
+    await jobs.update_one({"_id": job["_id"], "lease_id": job["lease_id"]}, {"$set": update})
+
+
+async def get_status(response_id):
+    """Latest job state for a response, with the evaluation once it is finished"""
+    job = await jobs.find_one({"response_id": response_id}, sort=[("created_at", -1)])
+    if not job:
+        return None
+    result = {
+        "response_id": response_id,
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "last_error": job.get("last_error")
+    }
+    if job["status"] == "done":
+        evaluation = await database.evaluations.find_one({"response_id": response_id}, sort=[("created_at", -1)])
+        result["evaluation"] = evaluation["evaluation"] if evaluation else None
+    return result
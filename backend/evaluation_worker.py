@@ -0,0 +1,81 @@
+"""Evaluation worker: consumes evaluation jobs queued by /user/submit-response.
+
+Run one or more copies alongside the API, e.g. `python evaluation_worker.py`.
+"""
+import asyncio
+import os
+import socket
+import uuid
+import database
+import evaluation_cache
+import evaluation_queue
+import gemini_api
+from config import EVAL_WORKER_CONCURRENCY, EVAL_WORKER_POLL_SECONDS, EVAL_JOB_LEASE_SECONDS
+
+
+async def heartbeat(job):
+    """Keep renewing the lease while the job runs, which can outlast one lease"""
+    while True:
+        await asyncio.sleep(EVAL_JOB_LEASE_SECONDS / 3)
+        try:
+            if not await evaluation_queue.renew(job):
+                return
+        except Exception as e:
+            print(f"Error renewing lease for evaluation job {job['_id']}: {e}")
+
+
+async def process(job):
+    evaluation_data = job["payload"]
+    renewer = asyncio.create_task(heartbeat(job))
+
+    try:
+        evaluation = await evaluation_cache.get_or_compute(
+            gemini_api.evaluation_cache_key(evaluation_data),
+            lambda: gemini_api.evaluate_enhanced_response_async(evaluation_data)
+        )
+        if "error" in evaluation:
+            print(f"Evaluation job {job['_id']} failed (attempt {job['attempts']}): {evaluation['error']}")
+            await evaluation_queue.fail(job, evaluation["error"], evaluation.get("retryable", True))
+            return
+        # Only the current lease holder may write the result
+        if not await evaluation_queue.renew(job):
+            print(f"Evaluation job {job['_id']} lost its lease; dropping result")
+            return
+        if not await database.save_evaluation(job["response_id"], evaluation):
+            raise RuntimeError("Failed to save evaluation")
+        await evaluation_queue.complete(job)
+    except Exception as e:
+        print(f"Evaluation job {job['_id']} failed (attempt {job['attempts']}): {e}")
+        await evaluation_queue.fail(job, str(e))
+    finally:
+        renewer.cancel()
+
+
+async def run_slot(worker_id):
+    while True:
+        try:
+            job = await evaluation_queue.claim(worker_id)
+        except Exception as e:
+            print(f"Error claiming evaluation job: {e}")
+            job = None
+        if job is None:
+            await asyncio.sleep(EVAL_WORKER_POLL_SECONDS)
+            continue
+        await process(job)
+
+
+async def main():
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    try:
+        await database.run_once("indexes", database.create_collections, database.collections_version())
+    except Exception as e:
+        print(f"❌ Index setup failed, continuing without it: {e}")
+    print(f"✅ Evaluation worker {worker_id} started with {EVAL_WORKER_CONCURRENCY} slots")
+    await asyncio.gather(*(run_slot(worker_id) for _ in range(EVAL_WORKER_CONCURRENCY)))
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
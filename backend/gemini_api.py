@@ -1,13 +1,42 @@
-import google.generativeai as genai
-from config import GEMINI_API_KEY
+from config import EVALUATION_BATCH_SIZE, EVALUATION_CONCURRENCY
 from typing import Dict, List
+import asyncio
 import json
+from evaluation_cache import make_key, normalize_answer
+from gemini_gateway import gateway, is_transient
 
-genai.configure(api_key=GEMINI_API_KEY)
-model = genai.GenerativeModel("gemini-1.5-flash")
+# Bump these whenever a prompt template changes so cached results are not reused
+EVALUATION_PROMPT_VERSION = "1"
+ANALYSIS_PROMPT_VERSION = "1"
 
-def evaluate_enhanced_response(evaluation_data: Dict) -> Dict:
-    prompt = f"""
+def evaluation_cache_key(evaluation_data: Dict) -> str:
+    # Exactly the inputs of build_enhanced_prompt: the candidate profile is part
+    # of the prompt, so evaluations are never shared between candidates
+    return make_key(
+        "enhanced_evaluation",
+        EVALUATION_PROMPT_VERSION,
+        normalize_answer(evaluation_data["response"]),
+        evaluation_data["test_log"],
+        evaluation_data["photo_metadata"],
+        evaluation_data["user"]
+    )
+
+def analysis_cache_key(interview_data: Dict, questions_first: bool = False) -> str:
+    # The streaming endpoint builds its prompt with questions_first=True, so its
+    # results are cached apart from the plain analysis
+    return make_key(
+        "interview_analysis_stream" if questions_first else "interview_analysis",
+        ANALYSIS_PROMPT_VERSION,
+        interview_data.get("jobTitle", "professional"),
+        interview_data.get("movementAnalysis") or [],
+        [
+            (r.get("questionText", ""), normalize_answer(r.get("userResponse", "")))
+            for r in interview_data.get("responses", [])
+        ]
+    )
+
+def build_enhanced_prompt(evaluation_data: Dict) -> str:
+    return f"""
     You are a professional interview evaluation system. Analyze this candidate's performance considering:
     
     1. **Technical Response**: {evaluation_data['response']}
@@ -31,106 +60,265 @@ def evaluate_enhanced_response(evaluation_data: Dict) -> Dict:
     
     Return as JSON with: score, technical_feedback, behavior_analysis, improvements, follow_up_questions
     """
+
+async def evaluate_enhanced_response_async(evaluation_data: Dict) -> Dict:
+    try:
+        return json.loads(await gateway.generate_async(build_enhanced_prompt(evaluation_data)))
+    except Exception as e:
+        return {"error": str(e), "retryable": is_transient(e)}
+
+def build_evaluation_prompt(question: str, answer: str) -> str:
+    return f"""
+    You are a professional interview evaluation system. Evaluate the candidate's answer.
     
+    Question: {question}
+    Answer: {answer}
+    
+    Return as JSON with: score (number 1-10), feedback (string), improvements (string)
+    """
+
+async def evaluate_response_async(question: str, answer: str) -> Dict:
+    """Score a single answer; returns score, feedback and improvements"""
     try:
-        response = model.generate_content(prompt)
-        return json.loads(response.text)
+        text = await gateway.generate_async(build_evaluation_prompt(question, answer))
+        return parse_evaluation(json.loads(text))
     except Exception as e:
         return {"error": str(e)}
 
-def analyze_interview_responses(interview_data: Dict) -> Dict:
-    """Analyze full interview responses using Gemini API"""
+def parse_evaluation(evaluation: Dict) -> Dict:
+    return {
+        "score": float(evaluation["score"]),
+        "feedback": evaluation.get("feedback", ""),
+        "improvements": evaluation.get("improvements", "")
+    }
+
+async def evaluate_responses_batch(items: List[Dict]) -> List[Dict]:
+    """Score several {id, question, answer} items with one Gemini request.
+
+    Items whose result is missing or unparseable are retried concurrently,
+    one evaluate_response_async call each. Results are returned in the order of `items`.
+    """
+    prompt = """
+    You are a professional interview evaluation system. Evaluate each of the candidate's answers below independently.
+    
+    Return ONLY a JSON array with one object per item, in any order:
+    [{"id": "item id", "score": number 1-10, "feedback": "string", "improvements": "string"}]
+    """
+    for item in items:
+        prompt += f"\n\nItem {item['id']}\nQuestion: {item['question']}\nAnswer: {item['answer']}"
+    
+    parsed = {}
     try:
-        movement_analysis = ""
-        if 'movementAnalysis' in interview_data and interview_data['movementAnalysis']:
-            movements = interview_data['movementAnalysis']
-            significant_movements = sum(1 for m in movements if m.get('movement') == 'significant')
-            movement_percentage = (significant_movements / len(movements)) * 100 if movements else 0
-            
-            movement_analysis = f"""
-            MOVEMENT ANALYSIS:
-            - Total movement events: {len(movements)}
-            - Significant movements: {significant_movements} ({movement_percentage:.1f}%)
-            - Movement pattern: {'High' if movement_percentage > 30 else 'Moderate' if movement_percentage > 15 else 'Low'} activity
-            - Suggested feedback: {'Consider maintaining more stillness during interviews' if movement_percentage > 30 else 'Good posture control' if movement_percentage < 10 else 'Minor adjustments to body language could help'}
-            """
-
-        prompt = f"""
-        You are an expert interview coach analyzing an interview for a {interview_data.get('jobTitle', 'professional')} position.
-
-        Analyze each response and provide:
-        1. Specific feedback on content, delivery, and effectiveness
-        2. A score from 1-10
-        3. Suggestions for improvement
-
-        {movement_analysis if movement_analysis else ""}
-
-        Then provide overall feedback as valid JSON.
-
-        Be sure to always return:
-        - "strongPoints": list of strengths. Do not leave it empty. If unsure, use inferred positives like "", "Showed basic understanding".
-        - "bodyLanguageFeedback": must be a dictionary with score, summary, strengths, and improvements.
-
-
-        Format your response as JSON with these fields:
-        {{
-            "overallFeedback": "comprehensive feedback",
-            ""strongPoints": "clear and specific strengths such as confidence, technical clarity, or concise answers",
-            "improvementAreas": ["list", "of", "improvements"],
-            "bodyLanguageFeedback": "analysis of body language",
-            "overallScore": numeric_score,
-            "questionAnalysis": [
-                {{
-                    "questionText": "question text",
-                    "userResponse": "user's response",
-                    "feedback": "detailed feedback",
-                    "score": numeric_score,
-                    "improvements": "suggestions"
-                }},
-                ...
-            ]
-        }}
-
-        Interview responses:
-        """
-        
-        for response in interview_data.get('responses', []):
-            prompt += f"\n\nQuestion: {response['questionText']}\nResponse: {response['userResponse']}"
-        
-        response = model.generate_content(prompt)
+        text = await gateway.generate_async(prompt)
+        json_start = text.find('[')
+        json_end = text.rfind(']') + 1
+        for evaluation in json.loads(text[json_start:json_end]):
+            try:
+                parsed[str(evaluation["id"])] = parse_evaluation(evaluation)
+            except (KeyError, TypeError, ValueError):
+                continue
+    except Exception as e:
+        print(f"Batch evaluation failed, falling back to single calls: {e}")
+    
+    missing = [item for item in items if str(item["id"]) not in parsed]
+    fallback = await asyncio.gather(*(evaluate_response_async(item["question"], item["answer"]) for item in missing))
+    parsed.update((str(item["id"]), result) for item, result in zip(missing, fallback))
+    return [parsed[str(item["id"])] for item in items]
+
+async def evaluate_answers(items: List[Dict], concurrency: int = EVALUATION_CONCURRENCY) -> List[Dict]:
+    """Evaluate many answers in batches of EVALUATION_BATCH_SIZE, with at most
+    `concurrency` batches in flight; results come back in the order of `items`"""
+    slots = asyncio.Semaphore(concurrency)
+    batches = [items[i:i + EVALUATION_BATCH_SIZE] for i in range(0, len(items), EVALUATION_BATCH_SIZE)]
+
+    async def run(batch):
+        async with slots:
+            return await evaluate_responses_batch(batch)
+
+    results = []
+    for batch, outcome in zip(batches, await asyncio.gather(*(run(b) for b in batches), return_exceptions=True)):
+        if isinstance(outcome, Exception):
+            results.extend({"error": str(outcome)} for _ in batch)
+        else:
+            results.extend(outcome)
+    return results
+
+def build_analysis_prompt(interview_data: Dict, questions_first: bool = False):
+    """Returns (prompt, movement_analysis) for a full-interview analysis"""
+    movement_analysis = ""
+    if 'movementAnalysis' in interview_data and interview_data['movementAnalysis']:
+        movements = interview_data['movementAnalysis']
+        significant_movements = sum(1 for m in movements if m.get('movement') == 'significant')
+        movement_percentage = (significant_movements / len(movements)) * 100 if movements else 0
         
+        movement_analysis = f"""
+        MOVEMENT ANALYSIS:
+        - Total movement events: {len(movements)}
+        - Significant movements: {significant_movements} ({movement_percentage:.1f}%)
+        - Movement pattern: {'High' if movement_percentage > 30 else 'Moderate' if movement_percentage > 15 else 'Low'} activity
+        - Suggested feedback: {'Consider maintaining more stillness during interviews' if movement_percentage > 30 else 'Good posture control' if movement_percentage < 10 else 'Minor adjustments to body language could help'}
+        """
+
+    prompt = f"""
+    You are an expert interview coach analyzing an interview for a {interview_data.get('jobTitle', 'professional')} position.
+
+    Analyze each response and provide:
+    1. Specific feedback on content, delivery, and effectiveness
+    2. A score from 1-10
+    3. Suggestions for improvement
+
+    {movement_analysis if movement_analysis else ""}
+
+    Then provide overall feedback as valid JSON.
+
+    Be sure to always return:
+    - "strongPoints": list of strengths. Do not leave it empty. If unsure, use inferred positives like "", "Showed basic understanding".
+    - "bodyLanguageFeedback": must be a dictionary with score, summary, strengths, and improvements.
+
+
+    Format your response as JSON with these fields:
+    {{
+        "overallFeedback": "comprehensive feedback",
+        ""strongPoints": "clear and specific strengths such as confidence, technical clarity, or concise answers",
+        "improvementAreas": ["list", "of", "improvements"],
+        "bodyLanguageFeedback": "analysis of body language",
+        "overallScore": numeric_score,
+        "questionAnalysis": [
+            {{
+                "questionText": "question text",
+                "userResponse": "user's response",
+                "feedback": "detailed feedback",
+                "score": numeric_score,
+                "improvements": "suggestions"
+            }},
+            ...
+        ]
+    }}
+    """
+    if questions_first:
+        prompt += '\n    Write the "questionAnalysis" field first, before any other field.\n'
+    prompt += "\n    Interview responses:\n"
+    
+    for response in interview_data.get('responses', []):
+        prompt += f"\n\nQuestion: {response['questionText']}\nResponse: {response['userResponse']}"
+    return prompt, movement_analysis
+
+def parse_analysis(text: str, movement_analysis: str) -> Dict:
+    try:
+        analysis = json.loads(text)
+        # Ensure required arrays exist
+        analysis['strongPoints'] = analysis.get('strongPoints', [])
+        analysis['improvementAreas'] = analysis.get('improvementAreas', [])
+        analysis['bodyLanguageFeedback'] = analysis.get('bodyLanguageFeedback', 
+            "No body language data available" if not movement_analysis else "")
+        return analysis
+    except json.JSONDecodeError:            
         try:
-            analysis = json.loads(response.text)
-            # Ensure required arrays exist
-            analysis['strongPoints'] = analysis.get('strongPoints', [])
-            analysis['improvementAreas'] = analysis.get('improvementAreas', [])
-            analysis['bodyLanguageFeedback'] = analysis.get('bodyLanguageFeedback', 
-                "No body language data available" if not movement_analysis else "")
-            return analysis
-        except json.JSONDecodeError:            
-            text = response.text
-            try:
-                json_start = text.find('{')
-                json_end = text.rfind('}') + 1
-                if json_start >= 0 and json_end > json_start:
-                    json_str = text[json_start:json_end]
-                    return json.loads(json_str)
-            except:
-                pass
-                
-            return {
-                "overallFeedback": text,
-                "strongPoints": [],
-                "improvementAreas": [],
-                "questionAnalysis": []
-            }
+            json_start = text.find('{')
+            json_end = text.rfind('}') + 1
+            if json_start >= 0 and json_end > json_start:
+                json_str = text[json_start:json_end]
+                return json.loads(json_str)
+        except:
+            pass
             
-    except Exception as e:
         return {
-            "error": str(e),
-            "overallFeedback": "An error occurred during analysis.",
+            "overallFeedback": text,
             "strongPoints": [],
             "improvementAreas": [],
-            "bodyLanguageFeedback": "",
             "questionAnalysis": []
-        }
\ No newline at end of file
+        }
+
+async def analyze_interview_responses_async(interview_data: Dict) -> Dict:
+    """Analyze full interview responses using Gemini API"""
+    try:
+        prompt, movement_analysis = build_analysis_prompt(interview_data)
+        return parse_analysis(await gateway.generate_async(prompt), movement_analysis)
+    except Exception as e:
+        return analysis_error(e)
+
+def analysis_error(e: Exception) -> Dict:
+    return {
+        "error": str(e),
+        "overallFeedback": "An error occurred during analysis.",
+        "strongPoints": [],
+        "improvementAreas": [],
+        "bodyLanguageFeedback": "",
+        "questionAnalysis": []
+    }
+
+class ArrayItemParser:
+    """Parses the objects of the JSON array `key` out of JSON text that arrives in
+    chunks. feed() returns the items completed by each chunk; scan position and
+    bracket depth carry over, so every character is looked at once."""
+
+    def __init__(self, key: str):
+        self.marker = f'"{key}"'
+        self.text = ""
+        self.pos = 0
+        self.started = False
+        self.done = False
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.item_start = None
+
+    def find_array(self) -> bool:
+        # Re-check a marker's length of overlap so one split across chunks is found
+        start = self.text.find(self.marker, max(0, self.pos - len(self.marker)))
+        if start < 0:
+            self.pos = len(self.text)
+            return False
+        bracket = self.text.find('[', start + len(self.marker))
+        if bracket < 0:
+            self.pos = start
+            return False
+        self.pos = bracket + 1
+        self.started = True
+        return True
+
+    def feed(self, chunk: str) -> List[Dict]:
+        self.text += chunk
+        if self.done or (not self.started and not self.find_array()):
+            return []
+        items = []
+        text = self.text
+        for i in range(self.pos, len(text)):
+            ch = text[i]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == '\\':
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch == '{':
+                if self.depth == 0:
+                    self.item_start = i
+                self.depth += 1
+            elif ch == '}':
+                self.depth -= 1
+                if self.depth == 0 and self.item_start is not None:
+                    try:
+                        items.append(json.loads(text[self.item_start:i + 1]))
+                    except json.JSONDecodeError:
+                        pass
+                    self.item_start = None
+            elif ch == ']' and self.depth == 0:
+                self.done = True
+                break
+        self.pos = len(text)
+        return items
+
+async def stream_interview_analysis(interview_data: Dict):
+    """Yield ("question", item) as each per-question analysis becomes parseable,
+    then ("summary", analysis) once the full response has arrived"""
+    prompt, movement_analysis = build_analysis_prompt(interview_data, questions_first=True)
+    parser = ArrayItemParser("questionAnalysis")
+    async for chunk in gateway.stream(prompt):
+        for item in parser.feed(chunk):
+            yield "question", item
+    
+    yield "summary", parse_analysis(parser.text, movement_analysis)
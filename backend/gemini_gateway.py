@@ -0,0 +1,254 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from config import (
+    GEMINI_API_KEY, GEMINI_MODEL, LLM_BACKEND,
+    GEMINI_RATE_PER_MINUTE, GEMINI_BURST, GEMINI_TIMEOUT_SECONDS, GEMINI_MAX_RETRIES,
+    GEMINI_BREAKER_THRESHOLD, GEMINI_BREAKER_RESET_SECONDS
+)
+
+# HTTP status codes worth retrying (google.api_core exceptions expose them as .code)
+RETRYABLE_CODES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class RateLimitedError(Exception):
+    pass
+
+
+def is_retryable(e):
+    return isinstance(e, (TimeoutError, asyncio.TimeoutError)) or \
+        getattr(e, "code", None) in RETRYABLE_CODES
+
+
+def is_transient(e):
+    """Worth trying again later: upstream trouble or our own throttling, as
+    opposed to e.g. a response that does not parse"""
+    return is_retryable(e) or isinstance(e, (CircuitOpenError, RateLimitedError))
+
+
+class RateLimiter:
+    """Token bucket refilled at `rate_per_minute`, holding at most `burst` tokens"""
+
+    def __init__(self, rate_per_minute, burst):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self):
+        """Take a token if available; otherwise return seconds until one is"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    async def acquire_async(self, timeout):
+        deadline = time.monotonic() + timeout
+        while (wait := self._take()) > 0:
+            if time.monotonic() + wait > deadline:
+                raise RateLimitedError("Gemini rate limit exceeded")
+            await asyncio.sleep(wait)
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures; after `reset_seconds` lets a
+    single trial call through (half-open) and closes again if it succeeds"""
+
+    def __init__(self, threshold, reset_seconds):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    def check(self):
+        """Raise if calls are blocked; returns True if the caller took the half-open
+        trial slot and must release() it when done"""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return False
+            if state == "half-open" and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+        raise CircuitOpenError("Gemini is unavailable (circuit open)")
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        """Free the half-open trial slot if its call ended without a verdict
+        (a non-retryable error, cancelled, or the consumer of a stream went away)"""
+        with self._lock:
+            self.trial_in_flight = False
+
+
+class GeminiBackend:
+    def __init__(self, model_name=GEMINI_MODEL):
+        import google.generativeai as genai
+        genai.configure(api_key=GEMINI_API_KEY)
+        self.model = genai.GenerativeModel(model_name)
+
+    async def generate_async(self, prompt):
+        response = await self.model.generate_content_async(prompt)
+        return response.text
+
+    async def stream(self, prompt):
+        response = await self.model.generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            yield chunk.text
+
+
+class FakeBackend:
+    """Local stand-in for tests and offline development; `responder(prompt)` returns the text"""
+
+    def __init__(self, responder=None):
+        self.responder = responder or (lambda prompt: json.dumps({
+            "score": 7,
+            "feedback": "Fake evaluation",
+            "improvements": "None",
+            "overallFeedback": "Fake analysis",
+            "questionAnalysis": []
+        }))
+        self.calls = []
+
+    async def generate_async(self, prompt):
+        self.calls.append(prompt)
+        return self.responder(prompt)
+
+    async def stream(self, prompt):
+        yield await self.generate_async(prompt)
+
+
+class GeminiGateway:
+    """Every Gemini call goes through here for rate limiting, per-call timeouts,
+    retries with exponential backoff and a shared circuit breaker"""
+
+    def __init__(self, backend, rate_limiter, breaker, timeout=GEMINI_TIMEOUT_SECONDS,
+                 max_retries=GEMINI_MAX_RETRIES, base_delay=1.0):
+        # None means "build the configured backend on first call", which keeps the
+        # google SDK import and client setup out of module import time
+        self._backend = backend
+        self.rate_limiter = rate_limiter
+        self.breaker = breaker
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = make_backend()
+        return self._backend
+
+    @backend.setter
+    def backend(self, backend):
+        self._backend = backend
+
+    def backoff(self, attempt):
+        return self.base_delay * (2 ** attempt) * (0.5 + random.random())
+
+    async def generate_async(self, prompt):
+        for attempt in range(self.max_retries + 1):
+            # Check the breaker first so an open circuit fails fast
+            trial = self.breaker.check()
+            try:
+                await self.rate_limiter.acquire_async(self.timeout)
+                text = await asyncio.wait_for(self.backend.generate_async(prompt), self.timeout)
+                self.breaker.record_success()
+                return text
+            except RateLimitedError:
+                # Never reached Gemini, so says nothing about its health
+                raise
+            except Exception as e:
+                # Only upstream-health errors count against the breaker; any
+                # other failure (bad request) gives no verdict either way and
+                # just frees the trial slot below
+                if not is_retryable(e):
+                    raise
+                self.breaker.record_failure()
+                if attempt == self.max_retries:
+                    raise
+            finally:
+                if trial:
+                    self.breaker.release()
+            await asyncio.sleep(self.backoff(attempt))
+
+    async def stream(self, prompt):
+        """Yield text chunks; retries only happen before the first chunk arrives"""
+        for attempt in range(self.max_retries + 1):
+            trial = self.breaker.check()
+            started = False
+            try:
+                await self.rate_limiter.acquire_async(self.timeout)
+                chunks = self.backend.stream(prompt).__aiter__()
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), self.timeout)
+                    except StopAsyncIteration:
+                        break
+                    started = True
+                    yield chunk
+                self.breaker.record_success()
+                return
+            except RateLimitedError:
+                raise
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                self.breaker.record_failure()
+                if started or attempt == self.max_retries:
+                    raise
+            finally:
+                # Also runs on cancellation and when the consumer closes the stream
+                if trial:
+                    self.breaker.release()
+            await asyncio.sleep(self.backoff(attempt))
+
+
+def make_backend(name=LLM_BACKEND):
+    if name == "fake":
+        return FakeBackend()
+    return GeminiBackend()
+
+
+gateway = GeminiGateway(
+    None,
+    RateLimiter(GEMINI_RATE_PER_MINUTE, GEMINI_BURST),
+    CircuitBreaker(GEMINI_BREAKER_THRESHOLD, GEMINI_BREAKER_RESET_SECONDS)
+)
+
+
+def set_backend(backend):
+    """Swap the model backend, e.g. gemini_gateway.set_backend(FakeBackend(...)) in tests"""
+    gateway.backend = backend
@@ -0,0 +1,198 @@
+"""Cross-worker cache invalidation.
+
+publish(entity, key) drops the entry locally straight away and records an event
+in the `invalidations` collection; every other worker receives it through a
+change stream (or by polling on a standalone mongod, where change streams are
+unavailable) and runs the handlers subscribed to that entity.
+
+Events are numbered from a shared counter. Numbers are allocated before the
+event is inserted, so concurrent publishers can commit out of order: a gap in
+the sequence is first held open for INVALIDATION_GAP_GRACE_SECONDS, and only a
+number still missing after that (or a lost stream) makes the worker flush
+everything, since it cannot know what it missed.
+"""
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime
+from pymongo import ReturnDocument
+from pymongo.errors import OperationFailure
+import background
+import database
+from config import INVALIDATION_POLL_SECONDS, INVALIDATION_GAP_GRACE_SECONDS
+
+origin = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+handlers = {}
+flush_handlers = []
+listener = None
+last_seq = 0
+# Sequence numbers skipped over but possibly still being committed
+missing = set()
+counters = {"published": 0, "received": 0, "flushes": 0, "mode": None}
+
+
+def subscribe(entity, handler):
+    """Call handler(key) whenever `entity` is invalidated, here or in another worker"""
+    handlers.setdefault(entity, []).append(handler)
+
+
+def on_flush(handler):
+    """Call handler() when this worker may have missed events and must drop everything"""
+    flush_handlers.append(handler)
+
+
+def apply(entity, key):
+    for handler in handlers.get(entity, []):
+        try:
+            handler(key)
+        except Exception as e:
+            print(f"Error handling invalidation {entity}:{key}: {e}")
+
+
+def flush():
+    missing.clear()
+    counters["flushes"] += 1
+    for handler in flush_handlers:
+        try:
+            handler()
+        except Exception as e:
+            print(f"Error flushing caches: {e}")
+
+
+async def next_seq():
+    doc = await database.counters.find_one_and_update(
+        {"_id": "invalidations"},
+        {"$inc": {"seq": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return doc["seq"]
+
+
+async def current_seq():
+    doc = await database.counters.find_one({"_id": "invalidations"})
+    return doc["seq"] if doc else 0
+
+
+async def record(entity, key):
+    try:
+        await database.invalidations.insert_one({
+            "_id": await next_seq(),
+            "entity": entity,
+            "key": key,
+            "origin": origin,
+            "created_at": datetime.utcnow()
+        })
+        counters["published"] += 1
+    except Exception as e:
+        print(f"Error publishing invalidation {entity}:{key}: {e}")
+
+
+def publish(entity, key=None):
+    """Invalidate locally now and broadcast to the other workers in the background"""
+    apply(entity, key)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        # No event loop (scripts, tests): nothing else to tell
+        return
+    background.schedule(record(entity, key))
+
+
+def expire_gap(seqs):
+    """Grace period over: any of seqs still missing was lost, so start over"""
+    if missing & seqs:
+        flush()
+
+
+def receive(event):
+    global last_seq
+    seq = event["_id"]
+    if seq in missing:
+        # A late commit filling a gap
+        missing.discard(seq)
+    elif seq <= last_seq:
+        # Already seen (catch-up after opening the stream overlaps it)
+        return
+    else:
+        if seq > last_seq + 1:
+            # Some events have not reached us; they may still be committing
+            gap = set(range(last_seq + 1, seq))
+            missing.update(gap)
+            asyncio.get_running_loop().call_later(INVALIDATION_GAP_GRACE_SECONDS, expire_gap, gap)
+        last_seq = seq
+    counters["received"] += 1
+    if event.get("origin") != origin:
+        apply(event["entity"], event.get("key"))
+
+
+def unseen():
+    """Query for events not received yet, including ones filling a gap"""
+    return {"_id": {"$gt": min(missing) - 1 if missing else last_seq}}
+
+
+async def watch():
+    async with database.invalidations.watch([{"$match": {"operationType": "insert"}}]) as stream:
+        counters["mode"] = "change_stream"
+        # try_next() opens the stream; then catch up on anything published
+        # before it was open. Seeing an event twice is harmless.
+        change = await stream.try_next()
+        async for event in database.invalidations.find(unseen()).sort("_id", 1):
+            receive(event)
+        if change:
+            receive(change["fullDocument"])
+        async for change in stream:
+            receive(change["fullDocument"])
+
+
+async def poll():
+    counters["mode"] = "polling"
+    while True:
+        async for event in database.invalidations.find(unseen()).sort("_id", 1):
+            receive(event)
+        await asyncio.sleep(INVALIDATION_POLL_SECONDS)
+
+
+async def listen():
+    global last_seq
+    use_polling = False
+    while True:
+        try:
+            # Start from the current position: a fresh worker has nothing stale
+            # cached, and after an error everything is flushed below
+            last_seq = await current_seq()
+            missing.clear()
+            if use_polling:
+                await poll()
+            else:
+                await watch()
+        except asyncio.CancelledError:
+            raise
+        except OperationFailure as e:
+            # Change streams need a replica set; a standalone mongod rejects them
+            if not use_polling and e.code in (40573, 40324):
+                use_polling = True
+                continue
+            print(f"Invalidation listener error: {e}")
+        except Exception as e:
+            print(f"Invalidation listener error: {e}")
+        flush()
+        await asyncio.sleep(INVALIDATION_POLL_SECONDS)
+
+
+def start():
+    global listener
+    if listener is None:
+        listener = asyncio.get_running_loop().create_task(listen())
+
+
+async def stop():
+    global listener
+    if listener is not None:
+        listener.cancel()
+        listener = None
+
+
+def stats():
+    return {**counters, "last_seq": last_seq, "missing": len(missing)}
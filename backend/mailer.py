@@ -0,0 +1,167 @@
+import asyncio
+import smtplib
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from email.mime.text import MIMEText
+from config import (
+    SMTP_SERVER, SMTP_PORT, SMTP_USERNAME, SMTP_PASSWORD, SMTP_STARTTLS, EMAIL_FROM,
+    SMTP_POOL_SIZE, SMTP_IDLE_SECONDS, MAIL_QUEUE_SIZE, MAIL_MAX_RETRIES
+)
+
+# Latency samples kept for the percentile metrics
+LATENCY_WINDOW = 1000
+
+
+class SMTPConnection:
+    """One persistent SMTP session, reconnected whenever it has dropped or idled out.
+    Calls are blocking, so they run on the mailer's thread pool."""
+
+    def __init__(self, host=SMTP_SERVER, port=SMTP_PORT, username=SMTP_USERNAME,
+                 password=SMTP_PASSWORD, starttls=SMTP_STARTTLS, idle_seconds=SMTP_IDLE_SECONDS):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.idle_seconds = idle_seconds
+        self.server = None
+        self.last_used = 0
+
+    def connect(self):
+        self.close()
+        server = smtplib.SMTP(self.host, self.port, timeout=30)
+        if self.starttls:
+            server.starttls()
+        if self.username:
+            server.login(self.username, self.password)
+        self.server = server
+        counters["connects"] += 1
+
+    def close(self):
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except Exception:
+                pass
+            self.server = None
+
+    def send(self, msg, to_addrs=None):
+        """Send msg to its To header, or to the envelope recipients to_addrs"""
+        # Servers drop idle sessions, so don't trust one that sat unused for long
+        if self.server is None or time.monotonic() - self.last_used > self.idle_seconds:
+            self.connect()
+        try:
+            self.server.send_message(msg, to_addrs=to_addrs)
+        except smtplib.SMTPServerDisconnected:
+            self.connect()
+            self.server.send_message(msg, to_addrs=to_addrs)
+        self.last_used = time.monotonic()
+
+
+def build_message(to_email, subject, body):
+    msg = MIMEText(body)
+    msg['Subject'] = subject
+    msg['From'] = EMAIL_FROM
+    msg['To'] = to_email
+    return msg
+
+
+executor = ThreadPoolExecutor(max_workers=SMTP_POOL_SIZE, thread_name_prefix="smtp")
+queue = None
+senders = []
+counters = {"queued": 0, "sent": 0, "failed": 0, "retries": 0, "dropped": 0, "connects": 0}
+latencies = deque(maxlen=LATENCY_WINDOW)
+
+
+def is_transient(e):
+    """True for failures worth retrying: dropped connections, network errors and
+    4xx replies. 5xx replies (bad recipient, auth rejected) will fail the same way again."""
+    if isinstance(e, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in e.recipients.values())
+    if isinstance(e, smtplib.SMTPResponseException):
+        return 400 <= e.smtp_code < 500
+    if isinstance(e, smtplib.SMTPServerDisconnected):
+        return True
+    # SMTPException is itself an OSError; only genuine socket errors count here
+    return isinstance(e, OSError) and not isinstance(e, smtplib.SMTPException)
+
+
+async def deliver(connection, msg):
+    """Send with retries and exponential backoff; returns True once delivered"""
+    loop = asyncio.get_running_loop()
+    for attempt in range(MAIL_MAX_RETRIES + 1):
+        try:
+            await loop.run_in_executor(executor, connection.send, msg)
+            return True
+        except Exception as e:
+            # Start the next attempt on a fresh session
+            await loop.run_in_executor(executor, connection.close)
+            if attempt == MAIL_MAX_RETRIES or not is_transient(e):
+                print(f"Email send error to {msg['To']}: {e}")
+                return False
+            counters["retries"] += 1
+            await asyncio.sleep(2 ** attempt)
+
+
+async def sender():
+    connection = SMTPConnection()
+    while True:
+        msg, queued_at = await queue.get()
+        try:
+            if await deliver(connection, msg):
+                counters["sent"] += 1
+                latencies.append(time.monotonic() - queued_at)
+            else:
+                counters["failed"] += 1
+        finally:
+            queue.task_done()
+
+
+def start():
+    """Start the sender tasks; called lazily on first send from the running loop"""
+    global queue
+    if queue is None:
+        queue = asyncio.Queue(maxsize=MAIL_QUEUE_SIZE)
+        senders.extend(asyncio.get_running_loop().create_task(sender()) for _ in range(SMTP_POOL_SIZE))
+
+
+def send(to_email, subject, body):
+    """Queue an email for delivery and return immediately.
+    Returns False if the queue is full and the email was not accepted."""
+    start()
+    try:
+        queue.put_nowait((build_message(to_email, subject, body), time.monotonic()))
+    except asyncio.QueueFull:
+        counters["dropped"] += 1
+        return False
+    counters["queued"] += 1
+    return True
+
+
+async def stop(timeout=10):
+    """Give queued emails up to `timeout` seconds to go out, then stop the senders"""
+    global queue
+    if queue is None:
+        return
+    try:
+        await asyncio.wait_for(queue.join(), timeout)
+    except asyncio.TimeoutError:
+        print(f"Mailer stopped with {queue.qsize()} emails still queued")
+    for task in senders:
+        task.cancel()
+    senders.clear()
+    queue = None
+
+
+def stats():
+    samples = sorted(latencies)
+    latency = {}
+    if samples:
+        latency = {
+            "avg": round(sum(samples) / len(samples), 3),
+            "p50": round(samples[len(samples) // 2], 3),
+            "p95": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+            "max": round(samples[-1], 3)
+        }
+    return {**counters, "queue_depth": queue.qsize() if queue else 0, "latency_seconds": latency}
@@ -0,0 +1,137 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from bson import ObjectId
+import background
+import database
+from config import PDF_IMPORT_WORKERS, PDF_PAGES_PER_TASK, PDF_IMPORT_STALE_SECONDS, QUESTION_INSERT_CHUNK_SIZE
+
+# Import lifecycle: queued -> running -> done, or failed. Progress lives in Mongo
+# so any worker can answer a status poll for an import running on another.
+# The spooled PDF only exists on the worker that accepted it, so an import whose
+# worker died cannot be resumed: once it has made no progress for
+# PDF_IMPORT_STALE_SECONDS it is reaped (marked failed).
+imports = database.pdf_imports
+
+# Text extraction is CPU bound, so page ranges are parsed in worker processes
+pool = background.ProcessPool(PDF_IMPORT_WORKERS)
+
+
+def count_pages(path):
+    import PyPDF2
+    with open(path, "rb") as f:
+        return len(PyPDF2.PdfReader(f).pages)
+
+
+def extract_page_range(path, start, end):
+    """Questions found on pages [start, end) of the PDF at path"""
+    import PyPDF2
+    questions = []
+    with open(path, "rb") as f:
+        reader = PyPDF2.PdfReader(f)
+        for page in reader.pages[start:end]:
+            text = page.extract_text()
+            if text:
+                questions.extend(database.split_page_questions(text))
+    return questions
+
+
+async def create(domain_id, filename, admin_email, time_limit):
+    result = await imports.insert_one({
+        "domain_id": domain_id,
+        "filename": filename,
+        "time_limit": time_limit,
+        "status": "queued",
+        "pages_total": None,
+        "pages_done": 0,
+        "created": 0,
+        "duplicate": 0,
+        "failed": 0,
+        "error": None,
+        "created_by": admin_email,
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
+    })
+    return str(result.inserted_id)
+
+
+async def update(import_id, fields, inc=None):
+    update = {"$set": {**fields, "updated_at": datetime.utcnow()}}
+    if inc:
+        update["$inc"] = inc
+    await imports.update_one({"_id": ObjectId(import_id)}, update)
+
+
+def stale(now):
+    return {
+        "status": {"$in": ["queued", "running"]},
+        "updated_at": {"$lte": now - timedelta(seconds=PDF_IMPORT_STALE_SECONDS)}
+    }
+
+
+async def reap(import_id=None):
+    """Mark imports abandoned by a worker that stopped as failed; returns how many"""
+    now = datetime.utcnow()
+    query = stale(now)
+    if import_id is not None:
+        query["_id"] = ObjectId(import_id)
+    result = await imports.update_many(
+        query,
+        {"$set": {"status": "failed", "error": "Import interrupted by a server restart", "updated_at": now}}
+    )
+    return result.modified_count
+
+
+async def get_status(import_id):
+    try:
+        # A client polling an import nobody is running should see it fail
+        await reap(import_id)
+        doc = await imports.find_one({"_id": ObjectId(import_id)})
+    except Exception:
+        return None
+    if not doc:
+        return None
+    doc["id"] = str(doc.pop("_id"))
+    return doc
+
+
+async def process(import_id, path, domain_id, admin_email, time_limit):
+    """Parse page ranges in parallel and insert each range's questions as soon as
+    it is ready, in page order"""
+    loop = asyncio.get_running_loop()
+    pages_total = await loop.run_in_executor(pool.get(), count_pages, path)
+    await update(import_id, {"status": "running", "pages_total": pages_total})
+
+    ranges = [(start, min(start + PDF_PAGES_PER_TASK, pages_total))
+              for start in range(0, pages_total, PDF_PAGES_PER_TASK)]
+    tasks = [loop.run_in_executor(pool.get(), extract_page_range, path, start, end)
+             for start, end in ranges]
+    for (start, end), task in zip(ranges, tasks):
+        texts = await task
+        counts = {"created": 0, "duplicate": 0, "failed": 0}
+        if texts:
+            results = await database.bulk_add_questions(
+                [{"domain_id": domain_id, "text": text, "time_limit": time_limit} for text in texts],
+                admin_email,
+                chunk_size=QUESTION_INSERT_CHUNK_SIZE
+            )
+            for r in results:
+                counts[r["status"]] += 1
+        await update(import_id, {}, inc={"pages_done": end - start, **counts})
+
+    await update(import_id, {"status": "done"})
+
+
+async def run(import_id, path, domain_id, admin_email, time_limit):
+    try:
+        await process(import_id, path, domain_id, admin_email, time_limit)
+    except Exception as e:
+        print(f"Error importing questions from PDF {import_id}: {e}")
+        await update(import_id, {"status": "failed", "error": str(e)})
+    finally:
+        os.remove(path)
+
+
+def schedule(import_id, path, domain_id, admin_email, time_limit):
+    """Run the import in the background; the spooled file is removed when it ends"""
+    background.schedule(run(import_id, path, domain_id, admin_email, time_limit))
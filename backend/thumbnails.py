@@ -0,0 +1,69 @@
+import asyncio
+import base64
+from io import BytesIO
+import background
+import database
+from config import THUMBNAIL_WORKERS
+
+THUMBNAIL_SIZE = (96, 96)
+PREVIEW_SIZE = (320, 240)
+
+# Decoding and resizing is CPU bound, so it runs in worker processes
+pool = background.ProcessPool(THUMBNAIL_WORKERS)
+
+
+def render_variants(data):
+    """Decode a photo once and return (thumbnail WebP bytes, preview JPEG bytes)"""
+    from PIL import Image, ImageOps
+
+    image = Image.open(BytesIO(data))
+    image = ImageOps.exif_transpose(image).convert("RGB")
+
+    thumbnail = image.copy()
+    thumbnail.thumbnail(THUMBNAIL_SIZE)
+    thumb_out = BytesIO()
+    thumbnail.save(thumb_out, "WEBP", quality=60)
+
+    preview = ImageOps.fit(image, PREVIEW_SIZE)
+    preview_out = BytesIO()
+    preview.save(preview_out, "JPEG", quality=75, optimize=True)
+    return thumb_out.getvalue(), preview_out.getvalue()
+
+
+async def process_photo(photo_id):
+    """Make sure the photo has a preview in GridFS and every response using it
+    carries the inline thumbnail"""
+    preview_name = f"{photo_id}.preview"
+    existing = await database.db.photos.files.find_one({"filename": preview_name}, {"metadata": 1})
+    if existing:
+        thumbnail = existing["metadata"]["thumbnail"]
+    else:
+        photo = await database.load_photo(photo_id)
+        if not photo:
+            return
+        loop = asyncio.get_running_loop()
+        thumb, preview = await loop.run_in_executor(pool.get(), render_variants, photo[1])
+        thumbnail = "data:image/webp;base64," + base64.b64encode(thumb).decode("ascii")
+        await database.photos.upload_from_stream(
+            preview_name,
+            preview,
+            metadata={"content_type": "image/jpeg", "encoding": "identity",
+                      "size": len(preview), "thumbnail": thumbnail}
+        )
+
+    await database.responses.update_many(
+        {"photo_ref.photo_id": photo_id, "photo_ref.thumbnail": {"$exists": False}},
+        {"$set": {"photo_ref.thumbnail": thumbnail, "photo_ref.preview_id": preview_name}}
+    )
+
+
+async def run(photo_id):
+    try:
+        await process_photo(photo_id)
+    except Exception as e:
+        print(f"Error generating thumbnails for photo {photo_id}: {e}")
+
+
+def schedule(photo_id):
+    """Generate thumbnails in the background without blocking the caller"""
+    background.schedule(run(photo_id))
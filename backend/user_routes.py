@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Response
 from pydantic import BaseModel
 from typing import List, Dict
 import database
-from app import get_current_user
-from gemini_api import evaluate_response
+from app import get_current_user, interview_bundle
+from config import EVALUATION_CONCURRENCY
+from gemini_api import evaluate_answers, evaluate_response_async
 
 user_router = APIRouter()
 
@@ -25,26 +27,29 @@ class InterviewReport(BaseModel):
 class CompleteInterviewReport(BaseModel):
     total_questions: int
     average_score: float
+    failed_questions: int = 0
     detailed_feedback: List[dict]
 
 @user_router.get("/domains", response_model=List[dict])
 async def get_domains(current_user=Depends(get_current_user)):
-    return database.get_all_domains()
+    return await database.get_all_domains()
 
 @user_router.post("/start-interview")
 async def start_interview(interview: InterviewStart, current_user=Depends(get_current_user)):
-    if not database.get_domain_by_id(interview.domain_id):
+    # Served as the stored bytes, with no per-request query or reshaping
+    bundle = await interview_bundle(interview.domain_id)
+    if bundle is None:
         raise HTTPException(status_code=404, detail="Domain not found")
-    return database.get_questions_by_domain(interview.domain_id)
+    return Response(content=bundle["body"], media_type="application/json")
 
 @user_router.post("/submit-answer", response_model=InterviewReport)
 async def submit_answer(answer: AnswerSubmit, current_user=Depends(get_current_user)):
-    question = database.get_question_by_id(answer.question_id)
+    question = await database.get_question_by_id(answer.question_id)
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
 
-    database.save_user_response(current_user.username, answer.question_id, answer.response)
-    evaluation = evaluate_response(question["text"], answer.response)
+    await database.save_user_response(current_user.username, answer.question_id, answer.response)
+    evaluation = await evaluate_response_async(question["text"], answer.response)
 
     return {
         "question_id": answer.question_id,
@@ -57,28 +62,46 @@ async def submit_answer(answer: AnswerSubmit, current_user=Depends(get_current_u
 
 @user_router.post("/complete-interview", response_model=CompleteInterviewReport)
 async def complete_interview(answers: List[AnswerSubmit], current_user=Depends(get_current_user)):
+    questions = await asyncio.gather(*(database.get_question_by_id(a.question_id) for a in answers))
+
+    # Evaluate every answer whose question exists in batched, concurrent requests
+    items = [
+        {"id": str(i), "question": question["text"], "answer": answer.response}
+        for i, (answer, question) in enumerate(zip(answers, questions))
+        if question
+    ]
+    evaluations = dict(zip(
+        (item["id"] for item in items),
+        await evaluate_answers(items, EVALUATION_CONCURRENCY)
+    ))
+
     feedbacks = []
-    total_score = 0
-    
-    for answer in answers:
-        question = database.get_question_by_id(answer.question_id)
-        evaluation = evaluate_response(question["text"], answer.response)
-        feedbacks.append({
-            "question": question["text"],
-            "response": answer.response,
-            "score": evaluation["score"],
-            "feedback": evaluation["feedback"]
-        })
-        total_score += evaluation["score"]
-        
-        database.save_user_response(
-            current_user.username,
-            answer.question_id,
-            answer.response
-        )
+    scores = []
+    for i, (answer, question) in enumerate(zip(answers, questions)):
+        evaluation = evaluations.get(str(i), {"error": "Question not found"})
+        item = {
+            "question_id": answer.question_id,
+            "question": question["text"] if question else None,
+            "response": answer.response
+        }
+        if "error" in evaluation:
+            item["error"] = evaluation["error"]
+        else:
+            item["score"] = evaluation["score"]
+            item["feedback"] = evaluation["feedback"]
+            scores.append(evaluation["score"])
+        feedbacks.append(item)
+
+        if question:
+            await database.save_user_response(
+                current_user.username,
+                answer.question_id,
+                answer.response
+            )
     
     return {
         "total_questions": len(answers),
-        "average_score": total_score / len(answers) if answers else 0,
+        "average_score": sum(scores) / len(scores) if scores else 0,
+        "failed_questions": len(answers) - len(scores),
         "detailed_feedback": feedbacks
-    }
\ No newline at end of file
+    }
@@ -233,6 +233,21 @@ useEffect(() => {
         }
       };
   
+      // List endpoints return one page at a time; follow X-Next-Cursor to the last page
+      const fetchAllPages = async (url, config) => {
+        const items = [];
+        let cursor = null;
+        do {
+          const response = await axios.get(url, {
+            ...config,
+            params: cursor ? { limit: 200, cursor } : { limit: 200 }
+          });
+          items.push(...response.data);
+          cursor = response.headers["x-next-cursor"];
+        } while (cursor);
+        return items;
+      };
+
       // Fetch all base data
       const [
         domainsResponse, 
@@ -242,18 +257,18 @@ useEffect(() => {
         adminPostsResponse
       ] = await Promise.all([
         axios.get(`${API_BASE_URL}/admin/domains`, config),
-        axios.get(`${API_BASE_URL}/admin/questions`, config),
-        axios.get(`${API_BASE_URL}/admin/responses`, config),
-        axios.get(`${API_BASE_URL}/admin/all-users`, config),
-        axios.get(`${API_BASE_URL}/admin/posts`, config)
+        fetchAllPages(`${API_BASE_URL}/admin/questions`, config),
+        fetchAllPages(`${API_BASE_URL}/admin/responses`, config),
+        fetchAllPages(`${API_BASE_URL}/admin/all-users`, config),
+        fetchAllPages(`${API_BASE_URL}/admin/posts`, config)
       ]);
   
       // Update states for base data
       setDomains(domainsResponse.data);
-      setQuestions(questionsResponse.data);
-      setResponses(responsesResponse.data);
-      setUsers(usersResponse.data.filter(user => user.role !== "admin")); 
-      setAdminPosts(adminPostsResponse.data);
+      setQuestions(questionsResponse);
+      setResponses(responsesResponse);
+      setUsers(usersResponse.filter(user => user.role !== "admin")); 
+      setAdminPosts(adminPostsResponse);
   
       // Fetch admin users and requests separately for default admin
       const currentUserEmail = localStorage.getItem("email");
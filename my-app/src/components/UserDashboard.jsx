@@ -91,16 +91,24 @@ useEffect(() => {
     const fetchAdminPosts = async () => {
       setIsLoadingPosts(true);
       try {
-        const response = await axios.get(
-          `${import.meta.env.VITE_API_BASE_URL}/admin/posts`,
-          {
-            headers: {
-              Authorization: `Bearer ${localStorage.getItem("access_token")}`,
-              'Content-Type': 'application/json'
+        // The posts list is paginated; follow X-Next-Cursor to the last page
+        const posts = [];
+        let cursor = null;
+        do {
+          const response = await axios.get(
+            `${import.meta.env.VITE_API_BASE_URL}/admin/posts`,
+            {
+              headers: {
+                Authorization: `Bearer ${localStorage.getItem("access_token")}`,
+                'Content-Type': 'application/json'
+              },
+              params: cursor ? { limit: 200, cursor } : { limit: 200 }
             }
-          }
-        );
-        setAdminPosts(response.data);
+          );
+          posts.push(...response.data);
+          cursor = response.headers["x-next-cursor"];
+        } while (cursor);
+        setAdminPosts(posts);
       } catch (error) {
         console.error("Error fetching admin posts:", error);
         setError("Failed to load admin posts");